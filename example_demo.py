@@ -44,20 +44,24 @@ def demo_basic_functionality():
     character_system = CharacterSystem()
     
     # Create characters from scenario
-    for char_name, char_data in rezero_scenario.config.characters.items():
-        character_system.create_character(
-            name=char_name,
-            description=char_data.get("description", ""),
-            personality=char_data.get("personality", ""),
-            background=char_data.get("background", "")
-        )
+    list(character_system.create_characters(
+        {
+            "name": char_name,
+            "description": char_data.get("description", ""),
+            "personality": char_data.get("personality", ""),
+            "background": char_data.get("background", "")
+        }
+        for char_name, char_data in rezero_scenario.config.characters.items()
+    ))
     
     print(f"   - Created {len(character_system.characters)} characters")
     
     # Set up relationships
-    character_system.set_character_relationship("Subaru", "Emilia", 0.9, "Deep love and devotion")
-    character_system.set_character_relationship("Subaru", "Rem", 0.7, "Complex but caring relationship")
-    character_system.set_character_relationship("Rem", "Ram", 0.8, "Twin sisters")
+    character_system.set_relationships([
+        ("Subaru", "Emilia", 0.9, "Deep love and devotion"),
+        ("Subaru", "Rem", 0.7, "Complex but caring relationship"),
+        ("Rem", "Ram", 0.8, "Twin sisters"),
+    ])
     
     print("   - Set up character relationships")
     
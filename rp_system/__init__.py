@@ -1,15 +1,31 @@
 """RPG Roleplay System - A production-ready roleplay system using Gemini Flash 2.5."""
 
+import importlib
+from typing import TYPE_CHECKING, Any
+
 __version__ = "1.0.0"
 __author__ = "RPG System"
 
-from .core.gemini_client import GeminiClient
-from .core.context_manager import ContextManager
-from .core.memory_system import MemorySystem
-from .scenarios.scenario_loader import ScenarioLoader
-from .characters.character_system import CharacterSystem
-from .world.world_state import WorldState
-from .interface.cli_interface import CLIInterface
+# Public classes are imported on first access (PEP 562) so that importing a
+# single subpackage does not pull in the API client and CLI dependencies.
+_LAZY_IMPORTS = {
+    "GeminiClient": ".core.gemini_client",
+    "ContextManager": ".core.context_manager",
+    "MemorySystem": ".core.memory_system",
+    "ScenarioLoader": ".scenarios.scenario_loader",
+    "CharacterSystem": ".characters.character_system",
+    "WorldState": ".world.world_state",
+    "CLIInterface": ".interface.cli_interface",
+}
+
+if TYPE_CHECKING:
+    from .core.gemini_client import GeminiClient
+    from .core.context_manager import ContextManager
+    from .core.memory_system import MemorySystem
+    from .scenarios.scenario_loader import ScenarioLoader
+    from .characters.character_system import CharacterSystem
+    from .world.world_state import WorldState
+    from .interface.cli_interface import CLIInterface
 
 __all__ = [
     "GeminiClient",
@@ -19,4 +35,18 @@ __all__ = [
     "CharacterSystem",
     "WorldState",
     "CLIInterface"
-]
\ No newline at end of file
+]
+
+
+def __getattr__(name: str) -> Any:
+    """Import public classes on first access."""
+    module_name = _LAZY_IMPORTS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module_name, __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
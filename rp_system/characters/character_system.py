@@ -2,13 +2,38 @@
 
 import logging
 import json
-from typing import Dict, List, Any, Optional, Set, Tuple
-from dataclasses import dataclass, field, asdict
+import sys
+from array import array
+from bisect import bisect_left
+from typing import Dict, List, Any, Optional, Set, Tuple, Iterator, Iterable
+from dataclasses import dataclass, field, fields, MISSING
 from datetime import datetime
-import copy
+from contextlib import contextmanager
 from pathlib import Path
 
+from ..core.compat import add_slots
+from ..core.storage import atomic_write_bytes, dumps_json, load_json_file
 
+
+# Sentinel for attributes that are not set
+_MISSING = object()
+
+# Relationship value thresholds and the labels for each band between them
+_REL_EDGES = (-0.7, -0.3, 0.3, 0.7)
+_REL_SHEET = ("Hostile", "Unfriendly", "Neutral", "Friendly", "Close")
+_REL_SUMMARY = ("hostile", "unfriendly", "neutral", "friendly", "very close")
+
+
+# Pre-bound formatter for percentage values on character sheets
+_PCT = "{:.1%}".format
+
+
+def _rel_label(value: float, labels: Tuple[str, ...]) -> str:
+    """Get the label for a relationship value (bands are open at the bottom)."""
+    return labels[bisect_left(_REL_EDGES, value)]
+
+
+@add_slots
 @dataclass
 class CharacterState:
     """Represents the current state of a character."""
@@ -46,9 +71,15 @@ class CharacterState:
     # Custom attributes
     custom_attributes: Dict[str, Any] = field(default_factory=dict)
     
+    # Bumped on every tracked change; used to invalidate cached sheets
+    _version: int = field(default=0, compare=False, repr=False, metadata={"no_serialize": True})
+    
     def to_dict(self) -> Dict[str, Any]:
-        """Convert to dictionary for serialization."""
-        data = asdict(self)
+        """Convert to dictionary for serialization.
+        
+        Containers are shared with the character rather than deep-copied.
+        """
+        data = {name: getattr(self, name) for name in _SERIALIZED_FIELDS}
         # Convert sets to lists for JSON serialization
         data['known_facts'] = list(self.known_facts)
         data['secrets'] = list(self.secrets)
@@ -62,6 +93,13 @@ class CharacterState:
     @classmethod
     def from_dict(cls, data: Dict[str, Any]) -> "CharacterState":
         """Create from dictionary."""
+        # Intern names so relationship lookups compare by identity
+        data['name'] = sys.intern(data['name'])
+        if data.get('relationships'):
+            data['relationships'] = {
+                sys.intern(other): value for other, value in data['relationships'].items()
+            }
+        
         # Convert lists back to sets
         if 'known_facts' in data:
             data['known_facts'] = set(data['known_facts'])
@@ -72,9 +110,32 @@ class CharacterState:
         if data.get('last_interaction'):
             data['last_interaction'] = datetime.fromisoformat(data['last_interaction'])
         
-        return cls(**data)
+        # Assign slots directly instead of binding arguments through __init__;
+        # defaults are only built for fields the saved data lacks
+        character = cls.__new__(cls)
+        for name, default, default_factory in _FIELD_DEFAULTS:
+            if name in data:
+                value = data[name]
+            elif default_factory is not MISSING:
+                value = default_factory()
+            elif default is not MISSING:
+                value = default
+            else:
+                raise TypeError(f"Missing required character field: {name}")
+            setattr(character, name, value)
+        return character
+
+
+_SERIALIZED_FIELDS = tuple(
+    f.name for f in fields(CharacterState) if not f.metadata.get("no_serialize")
+)
 
+_FIELD_DEFAULTS = tuple(
+    (f.name, f.default, f.default_factory) for f in fields(CharacterState)
+)
 
+
+@add_slots
 @dataclass
 class RelationshipChange:
     """Tracks a change in character relationship."""
@@ -84,16 +145,51 @@ class RelationshipChange:
     new_value: float
     reason: str
     timestamp: datetime
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert to dictionary for serialization."""
+        return {
+            "character1": self.character1,
+            "character2": self.character2,
+            "old_value": self.old_value,
+            "new_value": self.new_value,
+            "reason": self.reason,
+            "timestamp": self.timestamp.isoformat()
+        }
+    
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "RelationshipChange":
+        """Create from dictionary."""
+        return cls(
+            character1=data["character1"],
+            character2=data["character2"],
+            old_value=data["old_value"],
+            new_value=data["new_value"],
+            reason=data["reason"],
+            timestamp=datetime.fromisoformat(data["timestamp"])
+        )
 
 
 class CharacterSystem:
     """Manages character states, relationships, and interactions."""
     
-    def __init__(self, storage_path: Optional[str] = None):
+    # Relationship changes between full snapshots of characters.json
+    SNAPSHOT_INTERVAL = 32
+    
+    def __init__(
+        self,
+        storage_path: Optional[str] = None,
+        autosave: bool = True,
+        pretty: bool = False,
+        fsync: bool = False
+    ):
         """Initialize character system.
         
         Args:
             storage_path: Path to store character data
+            autosave: Whether to write to disk after every mutation
+            pretty: Whether to indent characters.json for human inspection
+            fsync: Whether to force snapshots to disk before replacing the old file
         """
         self.storage_path = Path(storage_path) if storage_path else Path("rp_characters")
         self.storage_path.mkdir(exist_ok=True)
@@ -107,6 +203,33 @@ class CharacterSystem:
         # Active characters in current scene
         self.active_characters: Set[str] = set()
         
+        # Flat edge list of relationship pairs (parallel arrays)
+        self._rel_src: List[str] = []
+        self._rel_dst: List[str] = []
+        self._rel_val = array("d")
+        self._rel_pos: Dict[int, int] = {}
+        
+        # Small integer ids used to build symmetric pair keys
+        self._char_id: Dict[str, int] = {}
+        
+        # Character sheets keyed by name, stamped with the character version
+        self._sheet_cache: Dict[str, Tuple[int, str]] = {}
+        
+        # Save batching
+        self.autosave = autosave
+        self.pretty = pretty
+        self.fsync = fsync
+        self._dirty = False
+        self._save_suspended = 0
+        
+        # Append-only relationship log; records carry a sequence number and
+        # the snapshot stores the last one it covers, so only newer changes
+        # are replayed over it
+        self._rel_log_path = self.storage_path / "relationships.jsonl"
+        self._rel_log = None
+        self._rel_seq = 0
+        self._mutations_since_snapshot = 0
+        
         # Load existing character data
         self._load_characters()
         
@@ -132,6 +255,7 @@ class CharacterSystem:
         Returns:
             Created character state
         """
+        name = sys.intern(name)
         if name in self.characters:
             self.logger.warning(f"Character {name} already exists, updating instead")
             return self.update_character(name, description=description, 
@@ -146,11 +270,28 @@ class CharacterSystem:
         )
         
         self.characters[name] = character
+        self._character_id(name)
+        self._sheet_cache.pop(name, None)
+        if character.relationships:
+            self._rebuild_relationship_index()
         self._save_characters()
         
         self.logger.info(f"Created character: {name}")
         return character
     
+    def create_characters(self, specs: Iterable[Dict[str, Any]]) -> Iterator[CharacterState]:
+        """Create characters lazily, saving once after the last one.
+        
+        Args:
+            specs: Keyword arguments for ``create_character``, one dict per character
+            
+        Yields:
+            Each created character state
+        """
+        with self.bulk_update():
+            for spec in specs:
+                yield self.create_character(**spec)
+    
     def get_character(self, name: str) -> Optional[CharacterState]:
         """Get a character by name.
         
@@ -177,12 +318,24 @@ class CharacterSystem:
             self.logger.warning(f"Character {name} not found for update")
             return None
         
+        # Skip the save when nothing actually changes
+        if all(
+            (getattr(character, key) if hasattr(character, key)
+             else character.custom_attributes.get(key, _MISSING)) == value
+            for key, value in kwargs.items()
+        ):
+            return character
+        
         # Update attributes
         for key, value in kwargs.items():
             if hasattr(character, key):
                 setattr(character, key, value)
             else:
                 character.custom_attributes[key] = value
+        character._version += 1
+        
+        if "relationships" in kwargs:
+            self._rebuild_relationship_index()
         
         self._save_characters()
         self.logger.debug(f"Updated character {name}: {list(kwargs.keys())}")
@@ -204,6 +357,8 @@ class CharacterSystem:
             reason: Reason for relationship change
         """
         relationship_value = max(-1.0, min(1.0, relationship_value))
+        character1 = sys.intern(character1)
+        character2 = sys.intern(character2)
         
         # Get characters
         char1 = self.characters.get(character1)
@@ -217,24 +372,44 @@ class CharacterSystem:
         old_value1 = char1.relationships.get(character2, 0.0)
         old_value2 = char2.relationships.get(character1, 0.0)
         
+        if (old_value1 == relationship_value and old_value2 == relationship_value
+                and character2 in char1.relationships and character1 in char2.relationships):
+            return
+        
         # Set relationships (bidirectional)
         char1.relationships[character2] = relationship_value
         char2.relationships[character1] = relationship_value
+        char1._version += 1
+        char2._version += 1
+        self._set_relationship_edge(character1, character2, relationship_value)
         
         # Track changes
         if old_value1 != relationship_value:
-            self.relationship_history.append(RelationshipChange(
+            change = RelationshipChange(
                 character1=character1,
                 character2=character2,
                 old_value=old_value1,
                 new_value=relationship_value,
                 reason=reason,
                 timestamp=datetime.now()
-            ))
+            )
+            self.relationship_history.append(change)
+            self._log_relationship_change(change)
+        else:
+            self._save_characters()
         
-        self._save_characters()
         self.logger.info(f"Set relationship {character1}-{character2}: {relationship_value}")
     
+    def set_relationships(self, relationships: Iterable[Tuple[str, str, float, str]]) -> None:
+        """Set several relationships with a single save.
+        
+        Args:
+            relationships: (character1, character2, relationship_value, reason) tuples
+        """
+        with self.bulk_update():
+            for character1, character2, relationship_value, reason in relationships:
+                self.set_character_relationship(character1, character2, relationship_value, reason)
+    
     def modify_relationship(
         self,
         character1: str,
@@ -259,6 +434,42 @@ class CharacterSystem:
         
         self.set_character_relationship(character1, character2, new_value, reason)
     
+    def _character_id(self, name: str) -> int:
+        """Get the interned integer id for a character name."""
+        char_id = self._char_id.get(name)
+        if char_id is None:
+            char_id = self._char_id[name] = len(self._char_id)
+        return char_id
+    
+    def _pair_key(self, character1: str, character2: str) -> int:
+        """Get an order-independent integer key for a character pair."""
+        i = self._character_id(character1)
+        j = self._character_id(character2)
+        return (i << 32) | j if i < j else (j << 32) | i
+    
+    def _set_relationship_edge(self, character1: str, character2: str, value: float) -> None:
+        """Insert or update a pair in the flat relationship edge list."""
+        key = self._pair_key(character1, character2)
+        pos = self._rel_pos.get(key)
+        if pos is None:
+            self._rel_pos[key] = len(self._rel_val)
+            self._rel_src.append(character1)
+            self._rel_dst.append(character2)
+            self._rel_val.append(value)
+        else:
+            self._rel_val[pos] = value
+    
+    def _rebuild_relationship_index(self) -> None:
+        """Rebuild the flat relationship edge list from character state."""
+        self._rel_src = []
+        self._rel_dst = []
+        self._rel_val = array("d")
+        self._rel_pos = {}
+        for char1_name, char1 in self.characters.items():
+            for char2_name, relationship_value in char1.relationships.items():
+                if self._pair_key(char1_name, char2_name) not in self._rel_pos:
+                    self._set_relationship_edge(char1_name, char2_name, relationship_value)
+    
     def get_relationship(self, character1: str, character2: str) -> float:
         """Get relationship value between two characters.
         
@@ -285,11 +496,8 @@ class CharacterSystem:
         
         # Update last interaction for active characters
         now = datetime.now()
-        for name in character_names:
-            character = self.characters.get(name)
-            if character:
-                character.last_interaction = now
-                character.interaction_count += 1
+        for name in self.active_characters & self.characters.keys():
+            self._touch(self.characters[name], now)
         
         self.logger.debug(f"Set active characters: {character_names}")
     
@@ -303,8 +511,17 @@ class CharacterSystem:
         
         character = self.characters.get(character_name)
         if character:
-            character.last_interaction = datetime.now()
-            character.interaction_count += 1
+            self._touch(character, datetime.now())
+    
+    def _touch(self, character: CharacterState, now: datetime) -> None:
+        """Record an interaction with a character.
+        
+        Args:
+            character: Character that was interacted with
+            now: Interaction time
+        """
+        character.last_interaction = now
+        character.interaction_count += 1
     
     def remove_active_character(self, character_name: str) -> None:
         """Remove a character from the active scene.
@@ -365,6 +582,9 @@ class CharacterSystem:
     def get_character_sheet(self, character_name: str) -> str:
         """Generate a character sheet for display.
         
+        Sheets are cached until the character is changed through
+        ``update_character`` or a relationship update.
+        
         Args:
             character_name: Character name
             
@@ -375,21 +595,25 @@ class CharacterSystem:
         if not character:
             return f"Character '{character_name}' not found."
         
+        cached = self._sheet_cache.get(character_name)
+        if cached and cached[0] == character._version:
+            return cached[1]
+        
         sheet_parts = [f"=== CHARACTER SHEET: {character.name.upper()} ==="]
         
         if character.description:
-            sheet_parts.append(f"Description: {character.description}")
+            sheet_parts.append("Description: " + character.description)
         
         if character.personality:
-            sheet_parts.append(f"Personality: {character.personality}")
+            sheet_parts.append("Personality: " + character.personality)
         
         if character.background:
-            sheet_parts.append(f"Background: {character.background}")
+            sheet_parts.append("Background: " + character.background)
         
         # Status
         status_parts = []
         if character.health != 1.0:
-            status_parts.append(f"Health: {character.health:.1%}")
+            status_parts.append("Health: " + _PCT(character.health))
         if character.emotional_state != "neutral":
             status_parts.append(f"Emotional State: {character.emotional_state}")
         if character.current_location:
@@ -400,7 +624,7 @@ class CharacterSystem:
         
         # Abilities
         if character.abilities:
-            abilities_text = ", ".join(f"{k}: {v}" for k, v in character.abilities.items())
+            abilities_text = ", ".join([f"{k}: {v}" for k, v in character.abilities.items()])
             sheet_parts.append(f"Abilities: {abilities_text}")
         
         # Equipment
@@ -414,27 +638,19 @@ class CharacterSystem:
         
         # Relationships
         if character.relationships:
-            rel_text = []
-            for other_char, value in character.relationships.items():
-                if value > 0.7:
-                    rel_text.append(f"{other_char} (Close)")
-                elif value > 0.3:
-                    rel_text.append(f"{other_char} (Friendly)")
-                elif value > -0.3:
-                    rel_text.append(f"{other_char} (Neutral)")
-                elif value > -0.7:
-                    rel_text.append(f"{other_char} (Unfriendly)")
-                else:
-                    rel_text.append(f"{other_char} (Hostile)")
-            
-            if rel_text:
-                sheet_parts.append(f"Relationships: {', '.join(rel_text)}")
+            rel_text = ", ".join([
+                f"{other_char} ({_rel_label(value, _REL_SHEET)})"
+                for other_char, value in character.relationships.items()
+            ])
+            sheet_parts.append(f"Relationships: {rel_text}")
         
         # Custom attributes
         for key, value in character.custom_attributes.items():
             sheet_parts.append(f"{key.title()}: {value}")
         
-        return "\n".join(sheet_parts)
+        sheet = "\n".join(sheet_parts)
+        self._sheet_cache[character_name] = (character._version, sheet)
+        return sheet
     
     def get_relationship_summary(self) -> str:
         """Get a summary of all character relationships.
@@ -445,34 +661,65 @@ class CharacterSystem:
         if not self.characters:
             return "No characters defined."
         
+        # Each pair appears once in the edge list
         summary_parts = ["=== CHARACTER RELATIONSHIPS ==="]
+        summary_parts += [
+            f"{char1_name} ↔ {char2_name}: {_rel_label(relationship_value, _REL_SUMMARY)} ({relationship_value:+.1f})"
+            for char1_name, char2_name, relationship_value in zip(self._rel_src, self._rel_dst, self._rel_val)
+        ]
         
-        processed_pairs = set()
+        return "\n".join(summary_parts)
+    
+    @contextmanager
+    def bulk_update(self) -> Iterator["CharacterSystem"]:
+        """Defer saving until a batch of mutations is complete.
         
-        for char1_name, char1 in self.characters.items():
-            for char2_name, relationship_value in char1.relationships.items():
-                # Avoid duplicate pairs
-                pair = tuple(sorted([char1_name, char2_name]))
-                if pair in processed_pairs:
-                    continue
-                processed_pairs.add(pair)
-                
-                if relationship_value > 0.7:
-                    status = "very close"
-                elif relationship_value > 0.3:
-                    status = "friendly"
-                elif relationship_value > -0.3:
-                    status = "neutral"
-                elif relationship_value > -0.7:
-                    status = "unfriendly"
-                else:
-                    status = "hostile"
-                
-                summary_parts.append(f"{char1_name} ↔ {char2_name}: {status} ({relationship_value:+.1f})")
+        Nested blocks are allowed; data is written once when the
+        outermost block exits.
+        """
+        self._save_suspended += 1
+        try:
+            yield self
+        finally:
+            self._save_suspended -= 1
+            if self._save_suspended == 0 and self._dirty:
+                self._save_now()
+    
+    def flush(self) -> None:
+        """Write pending character changes to disk."""
+        if self._dirty:
+            self._save_now()
+    
+    def close(self) -> None:
+        """Flush pending changes and close the relationship log."""
+        self.flush()
+        if self._rel_log:
+            self._rel_log.close()
+            self._rel_log = None
+    
+    def _log_relationship_change(self, change: RelationshipChange) -> None:
+        """Append a relationship change to the log and snapshot periodically."""
+        try:
+            self._rel_seq += 1
+            if self._rel_log is None:
+                self._rel_log = open(self._rel_log_path, "a", buffering=1)
+            self._rel_log.write(json.dumps({**change.to_dict(), "seq": self._rel_seq}) + "\n")
+        except Exception as e:
+            self.logger.error(f"Failed to log relationship change: {e}")
         
-        return "\n".join(summary_parts)
+        self._dirty = True
+        self._mutations_since_snapshot += 1
+        if (self._save_suspended == 0 and self.autosave
+                and self._mutations_since_snapshot >= self.SNAPSHOT_INTERVAL):
+            self._save_now()
     
     def _save_characters(self) -> None:
+        """Mark character data dirty and save unless writes are deferred."""
+        self._dirty = True
+        if self._save_suspended == 0 and self.autosave:
+            self._save_now()
+    
+    def _save_now(self) -> None:
         """Save character data to disk."""
         try:
             character_data = {
@@ -481,22 +728,17 @@ class CharacterSystem:
                     for name, char in self.characters.items()
                 },
                 "active_characters": list(self.active_characters),
-                "relationship_history": [
-                    {
-                        "character1": change.character1,
-                        "character2": change.character2,
-                        "old_value": change.old_value,
-                        "new_value": change.new_value,
-                        "reason": change.reason,
-                        "timestamp": change.timestamp.isoformat()
-                    }
-                    for change in self.relationship_history
-                ]
+                "relationship_seq": self._rel_seq
             }
             
-            with open(self.storage_path / "characters.json", "w") as f:
-                json.dump(character_data, f, indent=2, default=str)
+            atomic_write_bytes(
+                self.storage_path / "characters.json",
+                dumps_json(character_data, self.pretty),
+                self.fsync
+            )
             
+            self._dirty = False
+            self._mutations_since_snapshot = 0
             self.logger.debug("Saved character data")
             
         except Exception as e:
@@ -505,36 +747,73 @@ class CharacterSystem:
     def _load_characters(self) -> None:
         """Load character data from disk."""
         character_file = self.storage_path / "characters.json"
+        snapshot_seq = None
         
-        if not character_file.exists():
+        if character_file.exists():
+            try:
+                character_data = load_json_file(character_file)
+                
+                # Load characters
+                for name, char_dict in character_data.get("characters", {}).items():
+                    self.characters[sys.intern(name)] = CharacterState.from_dict(char_dict)
+                
+                # Load active characters
+                self.active_characters = set(character_data.get("active_characters", []))
+                
+                # Migrate relationship history from older snapshot files
+                legacy_history = character_data.get("relationship_history", [])
+                if legacy_history and not self._rel_log_path.exists():
+                    with open(self._rel_log_path, "w") as f:
+                        for change_dict in legacy_history:
+                            f.write(json.dumps(change_dict) + "\n")
+                    # The snapshot already holds the migrated changes
+                    snapshot_seq = 0
+                
+                # Snapshots from before sequence numbers replay the whole log
+                snapshot_seq = character_data.get("relationship_seq", snapshot_seq)
+                
+                self.logger.info(f"Loaded {len(self.characters)} characters")
+                
+            except Exception as e:
+                self.logger.error(f"Failed to load character data: {e}")
+        
+        self._load_relationship_log(snapshot_seq)
+        self._rebuild_relationship_index()
+    
+    def _load_relationship_log(self, snapshot_seq: Optional[int]) -> None:
+        """Replay the relationship log into history and character state.
+        
+        Args:
+            snapshot_seq: Last sequence number covered by characters.json,
+                or None to apply every logged change
+        """
+        self._rel_seq = snapshot_seq or 0
+        
+        if not self._rel_log_path.exists():
             return
         
         try:
-            with open(character_file) as f:
-                character_data = json.load(f)
-            
-            # Load characters
-            for name, char_dict in character_data.get("characters", {}).items():
-                self.characters[name] = CharacterState.from_dict(char_dict)
-            
-            # Load active characters
-            self.active_characters = set(character_data.get("active_characters", []))
-            
-            # Load relationship history
-            for change_dict in character_data.get("relationship_history", []):
-                self.relationship_history.append(RelationshipChange(
-                    character1=change_dict["character1"],
-                    character2=change_dict["character2"],
-                    old_value=change_dict["old_value"],
-                    new_value=change_dict["new_value"],
-                    reason=change_dict["reason"],
-                    timestamp=datetime.fromisoformat(change_dict["timestamp"])
-                ))
-            
-            self.logger.info(f"Loaded {len(self.characters)} characters")
+            with open(self._rel_log_path) as f:
+                for line in f:
+                    if not line.strip():
+                        continue
+                    record = json.loads(line)
+                    change = RelationshipChange.from_dict(record)
+                    self.relationship_history.append(change)
+                    
+                    # Changes newer than the last snapshot are only in the log
+                    seq = record.get("seq", 0)
+                    self._rel_seq = max(self._rel_seq, seq)
+                    if snapshot_seq is not None and seq <= snapshot_seq:
+                        continue
+                    char1 = self.characters.get(change.character1)
+                    char2 = self.characters.get(change.character2)
+                    if char1 and char2:
+                        char1.relationships[change.character2] = change.new_value
+                        char2.relationships[change.character1] = change.new_value
             
         except Exception as e:
-            self.logger.error(f"Failed to load character data: {e}")
+            self.logger.error(f"Failed to load relationship log: {e}")
     
     def get_stats(self) -> Dict[str, Any]:
         """Get character system statistics.
@@ -543,7 +822,7 @@ class CharacterSystem:
             Statistics dictionary
         """
         active_count = len(self.active_characters)
-        total_relationships = sum(len(char.relationships) for char in self.characters.values()) // 2
+        total_relationships = len(self._rel_val)
         
         return {
             "total_characters": len(self.characters),
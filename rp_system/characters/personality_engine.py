@@ -1,13 +1,140 @@
 """Personality engine for consistent character behavior."""
 
+import functools
+import itertools
 import logging
-import random
-from typing import Dict, List, Any, Optional, Tuple
+from typing import Dict, List, Any, Optional, Tuple, Sequence
 from dataclasses import dataclass
 import re
+from bisect import bisect_left
 
+from ..core.compat import add_slots
 
-@dataclass
+_LOGGER = logging.getLogger(__name__)
+
+# Fixed order of the core traits in a profile's trait vector
+TRAIT_ORDER = (
+    "openness",
+    "conscientiousness",
+    "extraversion",
+    "agreeableness",
+    "neuroticism",
+    "dominance",
+    "warmth",
+    "impulsiveness"
+)
+TRAIT_IDX = {name: i for i, name in enumerate(TRAIT_ORDER)}
+_OPN, _CON, _EXT, _AGR, _NEU, _DOM, _WRM, _IMP = range(len(TRAIT_ORDER))
+
+# Every threshold the profile sections compare trait values against, and a
+# representative value for each band produced by quantize_traits
+_TRAIT_THRESHOLDS = (-0.5, -0.3, 0.0, 0.3, 0.5)
+_BAND_VALUES = (-1.0, -0.5, -0.4, -0.3, -0.15, 0.0, 0.15, 0.3, 0.4, 0.5, 1.0)
+
+
+def trait_vector(traits: Dict[str, float]) -> Tuple[float, ...]:
+    """Pack the core traits into a fixed-order tuple (missing traits are 0.0)."""
+    return tuple(traits.get(name, 0.0) for name in TRAIT_ORDER)
+
+
+def quantize_traits(vec: Sequence[float]) -> bytes:
+    """Quantize a trait vector to one byte per trait.
+    
+    Each byte is the band of the value relative to the profile thresholds:
+    even codes are the open intervals between thresholds and odd codes the
+    thresholds themselves, so 5 means exactly 0.0. Profile sections depend
+    only on these bands.
+    
+    Args:
+        vec: Trait values in TRAIT_ORDER order
+        
+    Returns:
+        Band codes from 0 to 10, one per trait
+    """
+    codes = []
+    for value in vec:
+        i = bisect_left(_TRAIT_THRESHOLDS, value)
+        codes.append(2 * i + (i < len(_TRAIT_THRESHOLDS) and _TRAIT_THRESHOLDS[i] == value))
+    return bytes(codes)
+
+
+def _tri(value: float) -> int:
+    """Quantize a trait to 1 (above 0.5), -1 (below -0.5) or 0."""
+    return (value > 0.5) - (value < -0.5)
+
+
+def _trait_mask(vec: Tuple[float, ...], indices: Tuple[int, ...]) -> int:
+    """Encode whether each selected trait is high or low as a bitmask.
+    
+    Trait ``n`` of ``indices`` sets bit ``2n`` when above 0.5 and bit
+    ``2n + 1`` when below -0.5.
+    """
+    mask = 0
+    for n, i in enumerate(indices):
+        value = vec[i]
+        if value > 0.5:
+            mask |= 1 << (2 * n)
+        elif value < -0.5:
+            mask |= 2 << (2 * n)
+    return mask
+
+
+def _copy_nested(value: Any) -> Any:
+    """Copy nested dicts and lists so cached templates are never shared."""
+    if isinstance(value, dict):
+        return {key: _copy_nested(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_copy_nested(item) for item in value]
+    return value
+
+
+# Behavioral tendencies emitted for each bit of the behavior mask
+_BEHAVIOR_TRAITS = (_OPN, _CON, _EXT, _AGR, _NEU)
+_BEHAVIOR_STRINGS = (
+    (1 << 0, ("Seeks new experiences", "Open to different perspectives", "Curious about unusual topics")),
+    (1 << 1, ("Prefers familiar routines", "Skeptical of new ideas", "Values tradition")),
+    (1 << 2, ("Plans ahead carefully", "Keeps commitments", "Pays attention to details")),
+    (1 << 3, ("Acts spontaneously", "Flexible with plans", "May overlook details")),
+    (1 << 4, ("Seeks social interaction", "Energized by groups", "Speaks up in conversations")),
+    (1 << 5, ("Prefers solitude or small groups", "Thinks before speaking", "Observes before participating")),
+    (1 << 6, ("Seeks harmony in relationships", "Considers others' feelings", "Cooperative in conflicts")),
+    (1 << 7, ("Prioritizes own interests", "Direct in expressing disagreement", "Competitive in interactions")),
+    (1 << 8, ("Sensitive to stress", "Experiences emotions intensely", "May worry about outcomes")),
+    (1 << 9, ("Remains calm under pressure", "Even emotional responses", "Optimistic outlook"))
+)
+
+# Default emotions emitted for each bit of the emotion mask
+_DEFAULT_EMOTION_TRAITS = (_NEU, _EXT)
+_DEFAULT_EMOTION_STRINGS = (
+    (1 << 0, ("anxious", "worried")),
+    (1 << 1, ("calm", "content")),
+    (1 << 2, ("cheerful", "energetic")),
+    (1 << 3, ("reserved", "contemplative"))
+)
+
+# Coping mechanisms and social preferences
+_STRUCTURED_COPING = ("makes detailed plans", "follows routines", "breaks problems into steps")
+_FLEXIBLE_COPING = ("goes with the flow", "seeks immediate solutions", "adapts quickly")
+_OUTGOING_SOCIAL_PREFERENCES = ("large groups", "public settings", "being center of attention")
+_RESERVED_SOCIAL_PREFERENCES = ("one-on-one interactions", "quiet settings", "deep conversations")
+
+# Trigger categories of an event description, as bits, and their keywords
+_TRIGGER_POSITIVE = 1
+_TRIGGER_NEGATIVE = 2
+_TRIGGER_HURTFUL = 4
+_TRIGGER_THREAT = 8
+_TRIGGER_SURPRISE = 16
+_TRIGGER_KEYWORDS = (
+    (_TRIGGER_POSITIVE, ("success", "achievement", "compliment", "gift", "victory")),
+    (_TRIGGER_NEGATIVE, ("failure", "loss", "death", "betrayal", "insult")),
+    (_TRIGGER_HURTFUL, ("betrayal", "insult")),
+    (_TRIGGER_THREAT, ("danger", "threat", "attack", "enemy")),
+    (_TRIGGER_SURPRISE, ("unexpected", "sudden", "surprise"))
+)
+
+
+@add_slots
+@dataclass(frozen=True)
 class PersonalityTrait:
     """Represents a personality trait with intensity."""
     name: str
@@ -15,6 +142,7 @@ class PersonalityTrait:
     description: str = ""
 
 
+@add_slots
 @dataclass
 class EmotionalState:
     """Represents current emotional state."""
@@ -29,7 +157,8 @@ class PersonalityEngine:
     
     def __init__(self):
         """Initialize personality engine."""
-        self.logger = logging.getLogger(__name__)
+        self.logger = _LOGGER
+        self._log_enabled = self.logger.isEnabledFor
         
         # Core personality dimensions (Big Five + additional)
         self.personality_dimensions = {
@@ -81,8 +210,59 @@ class PersonalityEngine:
             }
         }
         
+        # Speech style for every (extraversion, conscientiousness, neuroticism,
+        # dominance) combination of levels from _tri
+        self._speech_style_table = {
+            levels: self._build_speech_style(*levels)
+            for levels in itertools.product((-1, 0, 1), repeat=4)
+        }
+        
+        # Derived profile sections keyed by quantized traits; callers get copies
+        self._profile_sections = functools.lru_cache(maxsize=1024)(self._derive_profile_sections)
+        
+        # Every known emotion word and category name, for one membership test
+        self._known_emotions = frozenset(self.emotion_categories).union(
+            *self.emotion_categories.values()
+        )
+        
+        # Keyword groups compiled into one case-insensitive alternation each
+        # (substring matches)
+        self._consistency_patterns = {
+            "impulsive": self._keyword_pattern(["impulsive", "sudden", "without thinking"]),
+            "aggressive": self._keyword_pattern(["attack", "insult", "argue", "fight"]),
+            "withdrawal": self._keyword_pattern(["hide", "withdraw", "avoid", "isolate"]),
+            "submissive": self._keyword_pattern(["submit", "obey", "follow", "yield"])
+        }
+        
+        # Every trigger keyword in one pattern, one group per keyword; a
+        # lookahead lets matches overlap so a single scan finds them all
+        keyword_bits = {}
+        for bit, words in _TRIGGER_KEYWORDS:
+            for word in words:
+                keyword_bits[word] = keyword_bits.get(word, 0) | bit
+        self._trigger_pattern = re.compile(
+            "(?=" + "|".join(f"({re.escape(word)})" for word in keyword_bits) + ")",
+            re.IGNORECASE
+        )
+        self._trigger_bits = (0,) + tuple(keyword_bits.values())
+        
         self.logger.info("Initialized personality engine")
     
+    @staticmethod
+    def _keyword_pattern(words: List[str]) -> re.Pattern:
+        """Compile keywords into a single case-insensitive alternation pattern."""
+        return re.compile("|".join(re.escape(word) for word in words), re.IGNORECASE)
+    
+    def _trigger_categories(self, text: str) -> int:
+        """Scan text once for trigger keywords and return their category bits."""
+        found = 0
+        for match in self._trigger_pattern.finditer(text):
+            found |= self._trigger_bits[match.lastindex]
+            if found & _TRIGGER_POSITIVE:
+                # Positive triggers take precedence over everything else
+                break
+        return found
+    
     def create_personality_profile(
         self,
         traits: Dict[str, float],
@@ -103,18 +283,53 @@ class PersonalityEngine:
         normalized_traits = {}
         for trait, value in traits.items():
             normalized_traits[trait] = max(-1.0, min(1.0, value))
+        vec = trait_vector(normalized_traits)
         
-        # Determine speech style
-        speech_style = self._determine_speech_style(normalized_traits)
+        profile = self._build_profile(normalized_traits, vec, background_factors)
         
-        # Generate behavioral tendencies
-        behavioral_tendencies = self._generate_behavioral_tendencies(normalized_traits)
+        if self._log_enabled(logging.DEBUG):
+            self.logger.debug("Created personality profile with %d traits", len(normalized_traits))
+        return profile
+    
+    def create_personality_profiles_batch(
+        self,
+        trait_rows: Sequence[Sequence[float]],
+        background_factors: List[str] = None
+    ) -> List[Dict[str, Any]]:
+        """Create profiles for many characters from rows of trait values.
         
-        # Determine emotional patterns
-        emotional_patterns = self._generate_emotional_patterns(normalized_traits)
+        Args:
+            trait_rows: One row per character with values in TRAIT_ORDER order
+            background_factors: Factors shared by every character in the batch
+            
+        Returns:
+            One personality profile per row
+        """
+        background_factors = background_factors or []
         
-        # Generate relationship tendencies
-        relationship_tendencies = self._generate_relationship_tendencies(normalized_traits)
+        profiles = []
+        for row in trait_rows:
+            if len(row) != len(TRAIT_ORDER):
+                raise ValueError(f"Expected {len(TRAIT_ORDER)} trait values, got {len(row)}")
+            vec = tuple([max(-1.0, min(1.0, value)) for value in row])
+            profiles.append(
+                self._build_profile(dict(zip(TRAIT_ORDER, vec)), vec, list(background_factors))
+            )
+        
+        if self._log_enabled(logging.DEBUG):
+            self.logger.debug("Created %d personality profiles", len(profiles))
+        return profiles
+    
+    def _build_profile(
+        self,
+        normalized_traits: Dict[str, float],
+        vec: Tuple[float, ...],
+        background_factors: List[str]
+    ) -> Dict[str, Any]:
+        """Assemble a profile from already-normalized traits."""
+        speech_style, behavioral_tendencies, emotional_patterns, relationship_tendencies = (
+            _copy_nested(self._profile_sections(quantize_traits(vec)))
+        )
         
         profile = {
             "traits": normalized_traits,
@@ -125,220 +340,143 @@ class PersonalityEngine:
             "background_factors": background_factors
         }
         
-        self.logger.debug(f"Created personality profile with {len(normalized_traits)} traits")
         return profile
     
-    def _determine_speech_style(self, traits: Dict[str, float]) -> Dict[str, Any]:
-        """Determine speech style based on personality traits."""
-        style = {"patterns": [], "characteristics": []}
-        
-        # Extraversion affects verbosity
-        if traits.get("extraversion", 0) > 0.5:
-            style["verbosity"] = "high"
-            style["characteristics"].append("talkative")
-        elif traits.get("extraversion", 0) < -0.5:
-            style["verbosity"] = "low"
-            style["characteristics"].append("reserved")
-        else:
-            style["verbosity"] = "medium"
+    def _derive_profile_sections(self, bands: bytes) -> List[Any]:
+        """Compute the trait-derived sections of a profile (cached per bands).
         
-        # Conscientiousness affects formality
-        if traits.get("conscientiousness", 0) > 0.5:
-            style["formality"] = "high"
-            style["patterns"].extend(self.speech_patterns["formal"]["patterns"])
-        elif traits.get("conscientiousness", 0) < -0.5:
-            style["formality"] = "low"
-            style["patterns"].extend(self.speech_patterns["casual"]["patterns"])
+        Each trait is read from the vector once and shared by the speech style,
+        behavioral tendencies, emotional patterns and relationship tendencies.
+        """
+        vec = tuple([_BAND_VALUES[band] for band in bands])
+        (_openness, conscientiousness, extraversion, agreeableness,
+         neuroticism, dominance, _warmth, _impulsiveness) = vec
+        
+        # Speech style
+        template = self._speech_style_table[
+            (_tri(extraversion), _tri(conscientiousness), _tri(neuroticism), _tri(dominance))
+        ]
+        speech_style = dict(template)
+        speech_style["patterns"] = list(template["patterns"])
+        speech_style["characteristics"] = list(template["characteristics"])
+        
+        # Behavioral tendencies
+        mask = _trait_mask(vec, _BEHAVIOR_TRAITS)
+        behavioral_tendencies = []
+        for bit, strings in _BEHAVIOR_STRINGS:
+            if mask & bit:
+                behavioral_tendencies.extend(strings)
+        
+        # Emotional patterns
+        default_emotions = []
+        mask = _trait_mask(vec, _DEFAULT_EMOTION_TRAITS)
+        for bit, emotions in _DEFAULT_EMOTION_STRINGS:
+            if mask & bit:
+                default_emotions.extend(emotions)
+        
+        if agreeableness > 0.5:
+            stress_responses = ["seeks social support"]
         else:
-            style["formality"] = "medium"
+            stress_responses = ["withdraws or becomes confrontational"]
         
-        # Neuroticism affects emotional expression
-        if traits.get("neuroticism", 0) > 0.5:
-            style["emotional_expression"] = "high"
-            style["characteristics"].append("expressive")
+        if conscientiousness > 0.5:
+            coping_mechanisms = list(_STRUCTURED_COPING)
         else:
-            style["emotional_expression"] = "controlled"
+            coping_mechanisms = list(_FLEXIBLE_COPING)
         
-        # Dominance affects assertiveness
-        if traits.get("dominance", 0) > 0.5:
-            style["assertiveness"] = "high"
-            style["characteristics"].append("direct")
-        elif traits.get("dominance", 0) < -0.5:
-            style["assertiveness"] = "low"
-            style["characteristics"].append("indirect")
-        
-        return style
-    
-    def _generate_behavioral_tendencies(self, traits: Dict[str, float]) -> List[str]:
-        """Generate behavioral tendencies based on traits."""
-        tendencies = []
-        
-        # Openness
-        if traits.get("openness", 0) > 0.5:
-            tendencies.extend([
-                "Seeks new experiences",
-                "Open to different perspectives",
-                "Curious about unusual topics"
-            ])
-        elif traits.get("openness", 0) < -0.5:
-            tendencies.extend([
-                "Prefers familiar routines",
-                "Skeptical of new ideas",
-                "Values tradition"
-            ])
-        
-        # Conscientiousness
-        if traits.get("conscientiousness", 0) > 0.5:
-            tendencies.extend([
-                "Plans ahead carefully",
-                "Keeps commitments",
-                "Pays attention to details"
-            ])
-        elif traits.get("conscientiousness", 0) < -0.5:
-            tendencies.extend([
-                "Acts spontaneously",
-                "Flexible with plans",
-                "May overlook details"
-            ])
-        
-        # Extraversion
-        if traits.get("extraversion", 0) > 0.5:
-            tendencies.extend([
-                "Seeks social interaction",
-                "Energized by groups",
-                "Speaks up in conversations"
-            ])
-        elif traits.get("extraversion", 0) < -0.5:
-            tendencies.extend([
-                "Prefers solitude or small groups",
-                "Thinks before speaking",
-                "Observes before participating"
-            ])
-        
-        # Agreeableness
-        if traits.get("agreeableness", 0) > 0.5:
-            tendencies.extend([
-                "Seeks harmony in relationships",
-                "Considers others' feelings",
-                "Cooperative in conflicts"
-            ])
-        elif traits.get("agreeableness", 0) < -0.5:
-            tendencies.extend([
-                "Prioritizes own interests",
-                "Direct in expressing disagreement",
-                "Competitive in interactions"
-            ])
-        
-        # Neuroticism
-        if traits.get("neuroticism", 0) > 0.5:
-            tendencies.extend([
-                "Sensitive to stress",
-                "Experiences emotions intensely",
-                "May worry about outcomes"
-            ])
-        elif traits.get("neuroticism", 0) < -0.5:
-            tendencies.extend([
-                "Remains calm under pressure",
-                "Even emotional responses",
-                "Optimistic outlook"
-            ])
-        
-        return tendencies
-    
-    def _generate_emotional_patterns(self, traits: Dict[str, float]) -> Dict[str, Any]:
-        """Generate emotional response patterns."""
-        patterns = {
-            "default_emotions": [],
-            "stress_responses": [],
+        emotional_patterns = {
+            "default_emotions": default_emotions,
+            "stress_responses": stress_responses,
             "triggers": {},
-            "coping_mechanisms": []
-        }
-        
-        # Default emotional state based on traits
-        if traits.get("neuroticism", 0) > 0.5:
-            patterns["default_emotions"].extend(["anxious", "worried"])
-        elif traits.get("neuroticism", 0) < -0.5:
-            patterns["default_emotions"].extend(["calm", "content"])
-        
-        if traits.get("extraversion", 0) > 0.5:
-            patterns["default_emotions"].extend(["cheerful", "energetic"])
-        elif traits.get("extraversion", 0) < -0.5:
-            patterns["default_emotions"].extend(["reserved", "contemplative"])
-        
-        # Stress responses
-        if traits.get("agreeableness", 0) > 0.5:
-            patterns["stress_responses"].append("seeks social support")
-        else:
-            patterns["stress_responses"].append("withdraws or becomes confrontational")
-        
-        if traits.get("conscientiousness", 0) > 0.5:
-            patterns["coping_mechanisms"].extend([
-                "makes detailed plans",
-                "follows routines",
-                "breaks problems into steps"
-            ])
-        else:
-            patterns["coping_mechanisms"].extend([
-                "goes with the flow",
-                "seeks immediate solutions",
-                "adapts quickly"
-            ])
-        
-        return patterns
-    
-    def _generate_relationship_tendencies(self, traits: Dict[str, float]) -> Dict[str, Any]:
-        """Generate relationship behavior patterns."""
-        tendencies = {
-            "attachment_style": "",
-            "conflict_style": "",
-            "social_preferences": [],
-            "trust_patterns": []
+            "coping_mechanisms": coping_mechanisms
         }
         
-        # Attachment style (simplified)
-        agreeableness = traits.get("agreeableness", 0)
-        neuroticism = traits.get("neuroticism", 0)
-        
+        # Relationship tendencies: attachment style (simplified)
         if agreeableness > 0.3 and neuroticism < 0.3:
-            tendencies["attachment_style"] = "secure"
+            attachment_style = "secure"
         elif agreeableness > 0.3 and neuroticism > 0.3:
-            tendencies["attachment_style"] = "anxious"
+            attachment_style = "anxious"
         elif agreeableness < -0.3 and neuroticism < 0.3:
-            tendencies["attachment_style"] = "avoidant"
+            attachment_style = "avoidant"
         else:
-            tendencies["attachment_style"] = "disorganized"
+            attachment_style = "disorganized"
         
         # Conflict style
-        dominance = traits.get("dominance", 0)
-        agreeableness = traits.get("agreeableness", 0)
-        
         if dominance > 0.3 and agreeableness < 0:
-            tendencies["conflict_style"] = "competitive"
+            conflict_style = "competitive"
         elif dominance < 0 and agreeableness > 0.3:
-            tendencies["conflict_style"] = "accommodating"
+            conflict_style = "accommodating"
         elif dominance > 0.3 and agreeableness > 0.3:
-            tendencies["conflict_style"] = "collaborative"
+            conflict_style = "collaborative"
         elif dominance < 0 and agreeableness < 0:
-            tendencies["conflict_style"] = "avoidant"
+            conflict_style = "avoidant"
         else:
-            tendencies["conflict_style"] = "compromising"
+            conflict_style = "compromising"
         
         # Social preferences
-        extraversion = traits.get("extraversion", 0)
         if extraversion > 0.5:
-            tendencies["social_preferences"].extend([
-                "large groups",
-                "public settings",
-                "being center of attention"
-            ])
+            social_preferences = list(_OUTGOING_SOCIAL_PREFERENCES)
         elif extraversion < -0.5:
-            tendencies["social_preferences"].extend([
-                "one-on-one interactions",
-                "quiet settings",
-                "deep conversations"
-            ])
+            social_preferences = list(_RESERVED_SOCIAL_PREFERENCES)
+        else:
+            social_preferences = []
+        
+        relationship_tendencies = {
+            "attachment_style": attachment_style,
+            "conflict_style": conflict_style,
+            "social_preferences": social_preferences,
+            "trust_patterns": []
+        }
         
-        return tendencies
+        return [speech_style, behavioral_tendencies, emotional_patterns, relationship_tendencies]
+    
+    def _build_speech_style(self, extraversion: int, conscientiousness: int, neuroticism: int, dominance: int) -> Dict[str, Any]:
+        """Build the speech style template for one combination of trait levels.
+        
+        Each level is 1 (above 0.5), -1 (below -0.5) or 0.
+        """
+        patterns = []
+        characteristics = []
+        style = {"patterns": patterns, "characteristics": characteristics}
+        
+        # Extraversion affects verbosity
+        if extraversion > 0:
+            style["verbosity"] = "high"
+            characteristics.append("talkative")
+        elif extraversion < 0:
+            style["verbosity"] = "low"
+            characteristics.append("reserved")
+        else:
+            style["verbosity"] = "medium"
+        
+        # Conscientiousness affects formality
+        if conscientiousness > 0:
+            style["formality"] = "high"
+            patterns.extend(self.speech_patterns["formal"]["patterns"])
+        elif conscientiousness < 0:
+            style["formality"] = "low"
+            patterns.extend(self.speech_patterns["casual"]["patterns"])
+        else:
+            style["formality"] = "medium"
+        
+        # Neuroticism affects emotional expression
+        if neuroticism > 0:
+            style["emotional_expression"] = "high"
+            characteristics.append("expressive")
+        else:
+            style["emotional_expression"] = "controlled"
+        
+        # Dominance affects assertiveness
+        if dominance > 0:
+            style["assertiveness"] = "high"
+            characteristics.append("direct")
+        elif dominance < 0:
+            style["assertiveness"] = "low"
+            characteristics.append("indirect")
+        
+        style["patterns"] = tuple(patterns)
+        style["characteristics"] = tuple(characteristics)
+        return style
     
     def generate_response_guidance(
         self,
@@ -363,7 +501,9 @@ class PersonalityEngine:
         guidance_parts = []
         
         # Core personality guidance
-        traits = personality_profile.get("traits", {})
+        vec = trait_vector(personality_profile.get("traits", {}))
+        neuroticism = vec[_NEU]
+        extraversion = vec[_EXT]
         speech_style = personality_profile.get("speech_style", {})
         
         # Speech style guidance
@@ -378,55 +518,49 @@ class PersonalityEngine:
             guidance_parts.append("Use casual, informal language")
         
         # Emotional expression
-        if traits.get("neuroticism", 0) > 0.5:
+        if neuroticism > 0.5:
             guidance_parts.append("Express emotions more intensely")
-        elif traits.get("neuroticism", 0) < -0.5:
+        elif neuroticism < -0.5:
             guidance_parts.append("Maintain emotional composure")
         
         # Social behavior
-        if traits.get("extraversion", 0) > 0.5:
+        if extraversion > 0.5:
             guidance_parts.append("Be outgoing and engage actively")
-        elif traits.get("extraversion", 0) < -0.5:
+        elif extraversion < -0.5:
             guidance_parts.append("Be more reserved and thoughtful")
         
         # Relationship considerations
-        behavioral_tendencies = personality_profile.get("behavioral_tendencies", [])
-        if behavioral_tendencies:
-            guidance_parts.append(f"Behavior: {'; '.join(behavioral_tendencies[:3])}")
+        behavior_summary = "; ".join(personality_profile.get("behavioral_tendencies", [])[:3])
+        if behavior_summary:
+            guidance_parts.append(f"Behavior: {behavior_summary}")
         
         # Current emotion influence
         if current_emotion:
-            emotion_guidance = self._get_emotion_guidance(current_emotion, traits)
+            emotion_guidance = self._get_emotion_guidance(current_emotion, vec)
             if emotion_guidance:
                 guidance_parts.append(f"Emotional state: {emotion_guidance}")
         
         return " | ".join(guidance_parts)
     
-    def _get_emotion_guidance(self, emotion: str, traits: Dict[str, float]) -> str:
+    def _get_emotion_guidance(self, emotion: str, vec: Tuple[float, ...]) -> str:
         """Get guidance for expressing a specific emotion."""
-        emotion_lower = emotion.lower()
-        
-        # Find emotion category
-        emotion_category = None
-        for category, emotions in self.emotion_categories.items():
-            if emotion_lower in emotions or emotion_lower == category:
-                emotion_category = category
-                break
-        
-        if not emotion_category:
+        # Emotion words and category names share one index
+        if emotion.lower() not in self._known_emotions:
             return f"Currently feeling {emotion}"
         
         # Adjust expression based on traits
+        neuroticism = vec[_NEU]
+        extraversion = vec[_EXT]
         expression_intensity = "moderately"
         
-        if traits.get("neuroticism", 0) > 0.5:
+        if neuroticism > 0.5:
             expression_intensity = "intensely"
-        elif traits.get("neuroticism", 0) < -0.5:
+        elif neuroticism < -0.5:
             expression_intensity = "subtly"
         
-        if traits.get("extraversion", 0) > 0.5:
+        if extraversion > 0.5:
             expression_style = "openly"
-        elif traits.get("extraversion", 0) < -0.5:
+        elif extraversion < -0.5:
             expression_style = "internally"
         else:
             expression_style = "carefully"
@@ -450,49 +584,47 @@ class PersonalityEngine:
             Predicted emotional state
         """
         current_relationships = current_relationships or {}
-        traits = personality_profile.get("traits", {})
-        
-        # Analyze trigger event for emotional cues
-        trigger_lower = trigger_event.lower()
+        vec = trait_vector(personality_profile.get("traits", {}))
         
         # Detect emotional triggers
         primary_emotion = "neutral"
         intensity = 0.5
         secondary_emotions = []
+        triggers = self._trigger_categories(trigger_event)
         
         # Positive triggers
-        if any(word in trigger_lower for word in ["success", "achievement", "compliment", "gift", "victory"]):
+        if triggers & _TRIGGER_POSITIVE:
             primary_emotion = "joy"
             intensity = 0.7
         
         # Negative triggers
-        elif any(word in trigger_lower for word in ["failure", "loss", "death", "betrayal", "insult"]):
+        elif triggers & _TRIGGER_NEGATIVE:
             primary_emotion = "sadness"
             intensity = 0.8
-            if "betrayal" in trigger_lower or "insult" in trigger_lower:
+            if triggers & _TRIGGER_HURTFUL:
                 secondary_emotions.append("anger")
         
         # Threat triggers
-        elif any(word in trigger_lower for word in ["danger", "threat", "attack", "enemy"]):
+        elif triggers & _TRIGGER_THREAT:
             primary_emotion = "fear"
             intensity = 0.8
-            if traits.get("dominance", 0) > 0.5:
+            if vec[_DOM] > 0.5:
                 secondary_emotions.append("anger")
         
         # Surprise triggers
-        elif any(word in trigger_lower for word in ["unexpected", "sudden", "surprise"]):
+        elif triggers & _TRIGGER_SURPRISE:
             primary_emotion = "surprise"
             intensity = 0.6
         
         # Adjust intensity based on personality
-        neuroticism = traits.get("neuroticism", 0)
+        neuroticism = vec[_NEU]
         if neuroticism > 0.5:
             intensity = min(1.0, intensity * 1.3)
         elif neuroticism < -0.5:
             intensity = max(0.1, intensity * 0.7)
         
         # Add secondary emotions based on traits
-        if traits.get("agreeableness", 0) < -0.5 and primary_emotion in ["sadness", "fear"]:
+        if vec[_AGR] < -0.5 and primary_emotion in ["sadness", "fear"]:
             secondary_emotions.append("anger")
         
         return EmotionalState(
@@ -518,32 +650,36 @@ class PersonalityEngine:
         Returns:
             Tuple of (is_consistent, explanation)
         """
-        traits = personality_profile.get("traits", {})
-        behavioral_tendencies = personality_profile.get("behavioral_tendencies", [])
+        vec = trait_vector(personality_profile.get("traits", {}))
+        
+        # Only strongly conscientious, agreeable, extraverted or dominant
+        # characters can be inconsistent with an action
+        if (vec[_CON] <= 0.5 and vec[_AGR] <= 0.5
+                and vec[_EXT] <= 0.5 and vec[_DOM] <= 0.5):
+            return True, "Action is consistent with character personality"
         
-        action_lower = proposed_action.lower()
         inconsistencies = []
         
         # Check against major traits
         
         # Conscientiousness vs spontaneous actions
-        if traits.get("conscientiousness", 0) > 0.5:
-            if any(word in action_lower for word in ["impulsive", "sudden", "without thinking"]):
+        if vec[_CON] > 0.5:
+            if self._consistency_patterns["impulsive"].search(proposed_action):
                 inconsistencies.append("Character is highly conscientious but action seems impulsive")
         
         # Agreeableness vs aggressive actions
-        if traits.get("agreeableness", 0) > 0.5:
-            if any(word in action_lower for word in ["attack", "insult", "argue", "fight"]):
+        if vec[_AGR] > 0.5:
+            if self._consistency_patterns["aggressive"].search(proposed_action):
                 inconsistencies.append("Character is agreeable but action seems aggressive")
         
         # Extraversion vs withdrawal
-        if traits.get("extraversion", 0) > 0.5:
-            if any(word in action_lower for word in ["hide", "withdraw", "avoid", "isolate"]):
+        if vec[_EXT] > 0.5:
+            if self._consistency_patterns["withdrawal"].search(proposed_action):
                 inconsistencies.append("Character is extraverted but action involves withdrawal")
         
         # Dominance vs submissive actions
-        if traits.get("dominance", 0) > 0.5:
-            if any(word in action_lower for word in ["submit", "obey", "follow", "yield"]):
+        if vec[_DOM] > 0.5:
+            if self._consistency_patterns["submissive"].search(proposed_action):
                 inconsistencies.append("Character is dominant but action seems submissive")
         
         if inconsistencies:
@@ -0,0 +1,49 @@
+"""Compatibility helpers for older Python versions."""
+
+from dataclasses import fields, is_dataclass
+from typing import Type, TypeVar
+
+T = TypeVar("T")
+
+
+def _frozen_getstate(self):
+    return [getattr(self, f.name) for f in fields(self)]
+
+
+def _frozen_setstate(self, state):
+    for f, value in zip(fields(self), state):
+        object.__setattr__(self, f.name, value)
+
+
+def add_slots(cls: Type[T]) -> Type[T]:
+    """Rebuild a dataclass with ``__slots__`` for its fields.
+
+    Equivalent to ``@dataclass(slots=True)``, which requires Python 3.10+.
+    Apply it above the ``@dataclass`` decorator.
+
+    Args:
+        cls: Dataclass to rebuild
+
+    Returns:
+        New class storing its fields in slots instead of a ``__dict__``
+    """
+    if not is_dataclass(cls):
+        raise TypeError(f"{cls.__name__} is not a dataclass")
+
+    field_names = tuple(f.name for f in fields(cls))
+    cls_dict = dict(cls.__dict__)
+    cls_dict["__slots__"] = field_names
+
+    # Class-level defaults would shadow the slot descriptors; the generated
+    # __init__ already carries the defaults.
+    for name in field_names:
+        cls_dict.pop(name, None)
+    cls_dict.pop("__dict__", None)
+    cls_dict.pop("__weakref__", None)
+
+    # Frozen instances reject setattr, so pickling must restore slots directly
+    if cls.__dataclass_params__.frozen:
+        cls_dict["__getstate__"] = _frozen_getstate
+        cls_dict["__setstate__"] = _frozen_setstate
+
+    return type(cls)(cls.__name__, cls.__bases__, cls_dict)
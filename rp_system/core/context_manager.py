@@ -1,19 +1,31 @@
 """Intelligent context window management for 1M token optimization."""
 
+import heapq
 import logging
 import json
-from typing import List, Dict, Any, Optional, Tuple
+import math
+import time
+from array import array
+from typing import List, Dict, Any, Optional, Tuple, Iterable, Iterator, Union
 from dataclasses import dataclass, asdict
-from datetime import datetime
 import re
 
+from .compat import add_slots
 
+# Section headers and separator used when assembling the context
+_CHARACTER_HEADER = "[CHARACTER SHEET]\n"
+_WORLD_HEADER = "[WORLD STATE]\n"
+_MEMORY_HEADER = "[MEMORY]\n"
+_SEPARATOR = "\n\n"
+
+
+@add_slots
 @dataclass
 class ContextSegment:
     """A segment of context with metadata."""
     content: str
     tokens: int
-    timestamp: datetime
+    timestamp: int  # time.monotonic_ns() when the segment was added
     importance: float  # 0.0 to 1.0
     segment_type: str  # 'recent', 'character', 'world', 'summary', 'memory'
     characters: List[str] = None
@@ -26,6 +38,234 @@ class ContextSegment:
             self.emotions = []
 
 
+class SegmentStore:
+    """Context segments of one type stored as parallel columns.
+    
+    Reads like a list of ContextSegment: indexing and iteration build segment
+    views from the columns, so changing a view does not change the store.
+    Token counts and importance scores live in typed arrays and the running
+    token total is kept up to date. With a maxlen, appending to a full store
+    drops its oldest segment, like a bounded deque. With by_importance,
+    segments are inserted in order of descending importance instead of
+    appended, so the most important ones are always at the front.
+    """
+    
+    def __init__(
+        self,
+        segment_type: str,
+        maxlen: Optional[int] = None,
+        by_importance: bool = False
+    ):
+        """Initialize an empty store.
+        
+        Args:
+            segment_type: Segment type recorded for appended segments
+            maxlen: Maximum number of segments kept, or None for no limit
+            by_importance: Keep segments sorted by descending importance
+        """
+        self.segment_type = segment_type
+        self.maxlen = maxlen
+        self.by_importance = by_importance
+        self.contents: List[str] = []
+        self.contents_lower: List[Optional[str]] = []  # Filled on first use
+        self.tokens = array("q")
+        self.importance = array("d")
+        self.timestamps = array("q")
+        self.segment_types: List[str] = []
+        self.characters: List[List[str]] = []
+        self.emotions: List[List[str]] = []
+        self.total_tokens = 0
+        
+        # Bumped on every change so cached views of the store can be reused
+        self.version = 0
+        
+        # Character name -> indices of segments tagged with it; rebuilt on
+        # first use after segments are removed or reordered
+        self._character_index: Optional[Dict[str, List[int]]] = {}
+    
+    def _columns(self) -> Tuple[Any, ...]:
+        return (
+            self.contents,
+            self.contents_lower,
+            self.tokens,
+            self.importance,
+            self.timestamps,
+            self.segment_types,
+            self.characters,
+            self.emotions
+        )
+    
+    def add(
+        self,
+        content: str,
+        tokens: int,
+        importance: float,
+        timestamp: int,
+        characters: List[str] = None,
+        emotions: List[str] = None,
+        segment_type: str = None
+    ) -> None:
+        """Append one segment's fields to the columns."""
+        if characters is None:
+            characters = []
+        if self.by_importance:
+            index = self._insertion_point(importance)
+            if index < len(self.contents):
+                self._insert(
+                    index,
+                    content,
+                    tokens,
+                    importance,
+                    timestamp,
+                    characters,
+                    emotions,
+                    segment_type
+                )
+                return
+        
+        if self._character_index is not None:
+            for name in dict.fromkeys(characters):
+                self._character_index.setdefault(name, []).append(len(self.contents))
+        
+        self.contents.append(content)
+        self.contents_lower.append(None)
+        self.tokens.append(tokens)
+        self.importance.append(importance)
+        self.timestamps.append(timestamp)
+        self.segment_types.append(segment_type or self.segment_type)
+        self.characters.append(characters)
+        self.emotions.append(emotions if emotions is not None else [])
+        self.total_tokens += tokens
+        self.version += 1
+        self._trim()
+    
+    def _insertion_point(self, importance: float) -> int:
+        """Find where a segment goes in a store sorted by importance.
+        
+        Equal scores keep insertion order, so the segment goes after every
+        segment at least as important (bisect_right on descending scores).
+        """
+        scores = self.importance
+        low, high = 0, len(scores)
+        while low < high:
+            middle = (low + high) // 2
+            if scores[middle] < importance:
+                high = middle
+            else:
+                low = middle + 1
+        return low
+    
+    def _insert(
+        self,
+        index: int,
+        content: str,
+        tokens: int,
+        importance: float,
+        timestamp: int,
+        characters: List[str],
+        emotions: Optional[List[str]],
+        segment_type: Optional[str]
+    ) -> None:
+        """Insert one segment's fields into the columns before an index."""
+        self.contents.insert(index, content)
+        self.contents_lower.insert(index, None)
+        self.tokens.insert(index, tokens)
+        self.importance.insert(index, importance)
+        self.timestamps.insert(index, timestamp)
+        self.segment_types.insert(index, segment_type or self.segment_type)
+        self.characters.insert(index, characters)
+        self.emotions.insert(index, emotions if emotions is not None else [])
+        self.total_tokens += tokens
+        self.version += 1
+        self._character_index = None
+        self._trim()
+    
+    def _trim(self) -> None:
+        """Drop segments beyond maxlen: the least important ones when sorted
+        by importance, otherwise the oldest."""
+        if self.maxlen is None or len(self.contents) <= self.maxlen:
+            return
+        if self.by_importance:
+            del self[self.maxlen:]
+        else:
+            del self[:len(self.contents) - self.maxlen]
+    
+    def append(self, segment: ContextSegment) -> None:
+        """Append a segment object."""
+        self.add(
+            segment.content,
+            segment.tokens,
+            segment.importance,
+            segment.timestamp,
+            segment.characters,
+            segment.emotions,
+            segment.segment_type
+        )
+    
+    def remove(self, indices: Iterable[int]) -> None:
+        """Remove the segments at the given indices.
+        
+        Rows are deleted in place, so the column buffers are reused rather
+        than rebuilt; meant for removing a few segments at a time.
+        """
+        for index in sorted(set(indices), reverse=True):
+            del self[index]
+    
+    def clear(self) -> None:
+        """Remove every segment."""
+        del self[:]
+    
+    def indices_for(self, character_name: str) -> List[int]:
+        """Get the indices of segments tagged with a character, in order."""
+        if self._character_index is None:
+            index = {}
+            for i, characters in enumerate(self.characters):
+                for name in dict.fromkeys(characters):
+                    index.setdefault(name, []).append(i)
+            self._character_index = index
+        return self._character_index.get(character_name, [])
+    
+    def content_lower(self, index: int) -> str:
+        """Get the lowercased content of a segment, caching it."""
+        content_lower = self.contents_lower[index]
+        if content_lower is None:
+            content_lower = self.contents[index].lower()
+            self.contents_lower[index] = content_lower
+        return content_lower
+    
+    def segment(self, index: int) -> ContextSegment:
+        """Build a view of the segment at an index."""
+        return ContextSegment(
+            content=self.contents[index],
+            tokens=self.tokens[index],
+            timestamp=self.timestamps[index],
+            importance=self.importance[index],
+            segment_type=self.segment_types[index],
+            characters=self.characters[index],
+            emotions=self.emotions[index]
+        )
+    
+    def __len__(self) -> int:
+        return len(self.contents)
+    
+    def __iter__(self) -> Iterator[ContextSegment]:
+        for index in range(len(self.contents)):
+            yield self.segment(index)
+    
+    def __getitem__(self, index: Union[int, slice]) -> Union[ContextSegment, List[ContextSegment]]:
+        if isinstance(index, slice):
+            return [self.segment(i) for i in range(*index.indices(len(self.contents)))]
+        return self.segment(index)
+    
+    def __delitem__(self, index: Union[int, slice]) -> None:
+        removed = self.tokens[index]
+        self.total_tokens -= sum(removed) if isinstance(index, slice) else removed
+        for column in self._columns():
+            del column[index]
+        self.version += 1
+        self._character_index = None
+
+
 class ContextManager:
     """Intelligent context window management for optimal RP experience."""
     
@@ -38,18 +278,35 @@ class ContextManager:
         self.max_tokens = max_tokens
         self.logger = logging.getLogger(__name__)
         
-        # Context segments by priority
-        self.recent_context: List[ContextSegment] = []
-        self.character_sheets: List[ContextSegment] = []
-        self.world_state: List[ContextSegment] = []
-        self.memory_segments: List[ContextSegment] = []
-        self.summaries: List[ContextSegment] = []
+        # Context segments by priority; recent messages and summaries are
+        # bounded so compression never walks an unbounded history, and a
+        # full recent store archives its oldest messages instead of dropping
+        # them
+        self.recent_context = SegmentStore("recent", maxlen=2000)
+        self.character_sheets = SegmentStore("character")
+        self.world_state = SegmentStore("world")
+        self.memory_segments = SegmentStore("memory", by_importance=True)
+        self.summaries = SegmentStore("summary", maxlen=200)
         
         # Configuration
         self.recent_token_reserve = 30000  # Always preserve recent context
         self.character_token_reserve = 20000  # Character sheets priority
         self.world_token_reserve = 15000  # World state priority
         
+        # Compression frees space down to the low watermark so it does not
+        # run again for every message added near the limit
+        self.compression_low_watermark = int(0.85 * max_tokens)
+        
+        # Eviction ranks segments by importance * exp(-decay_lambda * age),
+        # with age in seconds, so stale content goes first; the default
+        # halves importance every hour of a session
+        self.decay_lambda = math.log(2) / 3600
+        
+        # Everything before the recent messages, reused by build_context
+        # until the system prompt or one of those stores changes
+        self._context_head_key: Optional[Tuple[Any, ...]] = None
+        self._context_head: Optional[str] = None
+        
         self.logger.info(f"Initialized context manager with {max_tokens} token limit")
     
     def add_message(
@@ -71,21 +328,22 @@ class ContextManager:
             emotions: Emotional tags
             importance: Importance score (0.0-1.0)
         """
-        segment = ContextSegment(
-            content=content,
-            tokens=tokens,
-            timestamp=datetime.now(),
-            importance=importance,
-            segment_type="recent",
+        recent = self.recent_context
+        if recent.maxlen is not None and len(recent) >= recent.maxlen:
+            self._archive_messages(max(1, len(recent) // 4))
+        
+        recent.add(
+            content,
+            tokens,
+            importance,
+            time.monotonic_ns(),
             characters=characters or [],
             emotions=emotions or []
         )
-        
-        self.recent_context.append(segment)
         self.logger.debug(f"Added message: {tokens} tokens, importance {importance}")
         
-        # Auto-compress if we're getting too large
-        if self._total_tokens() > self.max_tokens:
+        # Auto-compress if we're getting too large and anything can be freed
+        if self._total_tokens() > self.max_tokens and self._can_compress():
             self._compress_context()
     
     def set_character_sheet(self, character_name: str, sheet_content: str, tokens: int) -> None:
@@ -97,21 +355,11 @@ class ContextManager:
             tokens: Token count
         """
         # Remove existing sheet for this character
-        self.character_sheets = [
-            s for s in self.character_sheets 
-            if character_name not in s.characters
-        ]
-        
-        segment = ContextSegment(
-            content=sheet_content,
-            tokens=tokens,
-            timestamp=datetime.now(),
-            importance=1.0,  # Character sheets are high importance
-            segment_type="character",
-            characters=[character_name]
-        )
+        sheets = self.character_sheets
+        sheets.remove(sheets.indices_for(character_name))
         
-        self.character_sheets.append(segment)
+        # Character sheets are high importance
+        sheets.add(sheet_content, tokens, 1.0, time.monotonic_ns(), characters=[character_name])
         self.logger.info(f"Updated character sheet for {character_name}: {tokens} tokens")
     
     def set_world_state(self, state_content: str, tokens: int) -> None:
@@ -121,15 +369,9 @@ class ContextManager:
             state_content: World state content
             tokens: Token count
         """
-        segment = ContextSegment(
-            content=state_content,
-            tokens=tokens,
-            timestamp=datetime.now(),
-            importance=0.9,  # World state is high importance
-            segment_type="world"
-        )
-        
-        self.world_state = [segment]  # Replace existing world state
+        # Replace existing world state; world state is high importance
+        self.world_state.clear()
+        self.world_state.add(state_content, tokens, 0.9, time.monotonic_ns())
         self.logger.info(f"Updated world state: {tokens} tokens")
     
     def add_memory(self, memory_content: str, tokens: int, importance: float = 0.7) -> None:
@@ -140,15 +382,7 @@ class ContextManager:
             tokens: Token count
             importance: Importance score
         """
-        segment = ContextSegment(
-            content=memory_content,
-            tokens=tokens,
-            timestamp=datetime.now(),
-            importance=importance,
-            segment_type="memory"
-        )
-        
-        self.memory_segments.append(segment)
+        self.memory_segments.add(memory_content, tokens, importance, time.monotonic_ns())
         self.logger.debug(f"Added memory: {tokens} tokens, importance {importance}")
     
     def add_summary(self, summary_content: str, tokens: int, covered_range: str = "") -> None:
@@ -159,127 +393,148 @@ class ContextManager:
             tokens: Token count
             covered_range: Description of what this summary covers
         """
-        segment = ContextSegment(
-            content=f"[SUMMARY: {covered_range}]\n{summary_content}",
-            tokens=tokens,
-            timestamp=datetime.now(),
-            importance=0.6,
-            segment_type="summary"
+        self.summaries.add(
+            f"[SUMMARY: {covered_range}]\n{summary_content}",
+            tokens,
+            0.6,
+            time.monotonic_ns()
         )
-        
-        self.summaries.append(segment)
         self.logger.info(f"Added summary: {tokens} tokens, covers {covered_range}")
     
     def _total_tokens(self) -> int:
         """Calculate total tokens across all segments."""
-        total = 0
-        for segment_list in [
-            self.recent_context,
-            self.character_sheets,
-            self.world_state,
-            self.memory_segments,
-            self.summaries
-        ]:
-            total += sum(s.tokens for s in segment_list)
-        return total
+        return (
+            self.recent_context.total_tokens +
+            self.character_sheets.total_tokens +
+            self.world_state.total_tokens +
+            self.memory_segments.total_tokens +
+            self.summaries.total_tokens
+        )
     
     def _compress_context(self) -> None:
         """Compress context to fit within token limits."""
         self.logger.info("Starting context compression")
         
         # Always preserve recent context (last N tokens)
-        recent_tokens = sum(s.tokens for s in self.recent_context)
-        if recent_tokens > self.recent_token_reserve:
+        if self.recent_context.total_tokens > self.recent_token_reserve:
             # Move older messages to memory/summary
             self._archive_old_messages()
         
-        # If still over limit, compress summaries and memories
-        if self._total_tokens() > self.max_tokens:
+        # If still over the low watermark, compress summaries and memories
+        if self._total_tokens() > self.compression_low_watermark:
             self._compress_memories()
         
         # Final check - remove lowest importance items if needed
-        if self._total_tokens() > self.max_tokens:
+        if self._total_tokens() > self.compression_low_watermark:
             self._remove_low_importance()
         
         self.logger.info(f"Context compression complete: {self._total_tokens()} tokens")
     
+    def _can_compress(self) -> bool:
+        """Check whether compression has anything it could free.
+        
+        Character sheets, world state, the recent token reserve and the
+        minimum kept memories and summaries are never evicted; when they
+        alone exceed the limit, compressing on every message frees nothing.
+        """
+        recent = self.recent_context
+        return (
+            (recent.total_tokens > self.recent_token_reserve and len(recent) > 20)
+            or len(self.memory_segments) > 2
+            or len(self.summaries) > 1
+        )
+    
     def _archive_old_messages(self) -> None:
         """Move old messages from recent context to summaries."""
         if len(self.recent_context) <= 5:  # Keep minimum recent messages
             return
         
         # Keep last 20 messages or recent_token_reserve worth, whichever is more
+        recent = self.recent_context
         keep_tokens = 0
         keep_count = 0
         
-        for i in range(len(self.recent_context) - 1, -1, -1):
-            keep_tokens += self.recent_context[i].tokens
+        for tokens in reversed(recent.tokens):
+            keep_tokens += tokens
             keep_count += 1
             
             if keep_tokens >= self.recent_token_reserve and keep_count >= 20:
                 break
         
-        if keep_count < len(self.recent_context):
+        if keep_count < len(recent):
             # Archive older messages
-            to_archive = self.recent_context[:-keep_count]
-            self.recent_context = self.recent_context[-keep_count:]
-            
-            # Create summary of archived messages
-            archived_content = "\n".join(s.content for s in to_archive)
-            archived_tokens = sum(s.tokens for s in to_archive)
-            
-            # This would be replaced with actual AI summarization
-            summary = f"Summary of {len(to_archive)} messages ({archived_tokens} tokens): Key events and character interactions from recent conversation."
-            
-            self.add_summary(summary, archived_tokens // 4, f"{len(to_archive)} messages")
-            
-            self.logger.debug(f"Archived {len(to_archive)} messages to summary")
+            self._archive_messages(len(recent) - keep_count)
+    
+    def _archive_messages(self, archive_count: int) -> None:
+        """Replace the oldest recent messages with a summary.
+        
+        Args:
+            archive_count: Number of messages to archive
+        """
+        recent = self.recent_context
+        
+        # Create summary of archived messages
+        archived_content = "\n".join(recent.contents[:archive_count])
+        archived_tokens = sum(recent.tokens[:archive_count])
+        del recent[:archive_count]
+        
+        # This would be replaced with actual AI summarization
+        summary = f"Summary of {archive_count} messages ({archived_tokens} tokens): Key events and character interactions from recent conversation."
+        
+        self.add_summary(summary, archived_tokens // 4, f"{archive_count} messages")
+        
+        self.logger.debug(f"Archived {archive_count} messages to summary")
     
     def _compress_memories(self) -> None:
         """Compress memory segments by combining similar ones."""
         if len(self.memory_segments) <= 3:
             return
         
-        # Sort by importance and keep top memories
-        self.memory_segments.sort(key=lambda x: x.importance, reverse=True)
-        
-        if len(self.memory_segments) > 10:
-            # Combine lower importance memories into summaries
-            to_compress = self.memory_segments[10:]
-            self.memory_segments = self.memory_segments[:10]
+        # Memories are kept sorted by importance, so the top ones are a prefix;
+        # the lower importance ones after it are combined into a summary
+        memories = self.memory_segments
+        if len(memories) > 10:
+            compressed_count = len(memories) - 10
+            combined_content = "\n".join(memories.contents[10:])
+            combined_tokens = sum(memories.tokens[10:])
+            del memories[10:]
             
-            if to_compress:
-                combined_content = "\n".join(s.content for s in to_compress)
-                combined_tokens = sum(s.tokens for s in to_compress)
-                
-                summary = f"Combined memories: {combined_content[:200]}..."
-                self.add_summary(summary, combined_tokens // 3, f"{len(to_compress)} memories")
+            summary = f"Combined memories: {combined_content[:200]}..."
+            self.add_summary(summary, combined_tokens // 3, f"{compressed_count} memories")
     
     def _remove_low_importance(self) -> None:
         """Remove lowest importance segments as last resort."""
-        # Collect all non-essential segments
+        # Collect all non-essential segments as (decayed importance, position,
+        # store, index); the position keeps ties in collection order
         removable = []
+        now = time.monotonic_ns()
+        decay_per_ns = self.decay_lambda / 1e9
         
-        for segment_list, min_keep in [
+        for store, min_keep in [
             (self.summaries, 1),
             (self.memory_segments, 2),
         ]:
-            if len(segment_list) > min_keep:
-                removable.extend(segment_list[min_keep:])
+            importance = store.importance
+            timestamps = store.timestamps
+            for i in range(min_keep, len(store)):
+                score = importance[i] * math.exp(-decay_per_ns * (now - timestamps[i]))
+                removable.append((score, len(removable), store, i))
         
-        # Sort by importance and remove lowest
-        removable.sort(key=lambda x: x.importance)
+        # Remove lowest importance first, popping only as many as needed
+        # instead of sorting every candidate
+        heapq.heapify(removable)
         
         removed_tokens = 0
-        while removable and self._total_tokens() > self.max_tokens:
-            segment = removable.pop(0)
-            removed_tokens += segment.tokens
-            
-            # Remove from appropriate list
-            for segment_list in [self.summaries, self.memory_segments]:
-                if segment in segment_list:
-                    segment_list.remove(segment)
-                    break
+        excess_tokens = self._total_tokens() - self.compression_low_watermark
+        removed = {self.summaries: [], self.memory_segments: []}
+        while removable and removed_tokens < excess_tokens:
+            _, _, store, index = heapq.heappop(removable)
+            removed_tokens += store.tokens[index]
+            removed[store].append(index)
+        
+        # Remove from the stores
+        for store, indices in removed.items():
+            store.remove(indices)
         
         if removed_tokens > 0:
             self.logger.warning(f"Removed {removed_tokens} tokens of low-importance content")
@@ -293,40 +548,72 @@ class ContextManager:
         Returns:
             Complete context string
         """
+        # Only the recent messages change from turn to turn; the sections
+        # before them are joined again only when one of their stores changes
+        head_key = (
+            system_prompt,
+            self.character_sheets.version,
+            self.world_state.version,
+            self.summaries.version,
+            self.memory_segments.version
+        )
+        if head_key != self._context_head_key:
+            self._context_head = self._build_context_head(system_prompt)
+            self._context_head_key = head_key
+        
+        # Recent context
+        head = self._context_head
+        recent_contents = self.recent_context.contents
+        if head is None:
+            context = _SEPARATOR.join(recent_contents)
+        elif recent_contents:
+            context = "".join((head, _SEPARATOR, _SEPARATOR.join(recent_contents)))
+        else:
+            context = head
+        
+        self.logger.info(f"Built context: {self._total_tokens()} tokens")
+        return context
+    
+    def _build_context_head(self, system_prompt: str) -> Optional[str]:
+        """Join the context sections that come before the recent messages.
+        
+        Args:
+            system_prompt: System prompt to include
+            
+        Returns:
+            Joined sections, or None when there are none
+        """
+        # Every section is preceded by a separator and, where it has one, a
+        # header; joining the pieces once avoids a copy per prefixed section
         context_parts = []
         
         # System prompt first
         if system_prompt:
-            context_parts.append(system_prompt)
+            context_parts += (_SEPARATOR, system_prompt)
         
         # Character sheets
-        for segment in self.character_sheets:
-            context_parts.append(f"[CHARACTER SHEET]\n{segment.content}")
+        for content in self.character_sheets.contents:
+            context_parts += (_SEPARATOR, _CHARACTER_HEADER, content)
         
         # World state
-        for segment in self.world_state:
-            context_parts.append(f"[WORLD STATE]\n{segment.content}")
+        for content in self.world_state.contents:
+            context_parts += (_SEPARATOR, _WORLD_HEADER, content)
         
         # Summaries
-        for segment in self.summaries:
-            context_parts.append(segment.content)
+        for content in self.summaries.contents:
+            context_parts += (_SEPARATOR, content)
         
         # Important memories
-        high_importance_memories = [
-            s for s in self.memory_segments 
-            if s.importance > 0.7
-        ]
-        for segment in high_importance_memories:
-            context_parts.append(f"[MEMORY]\n{segment.content}")
+        memories = self.memory_segments
+        for content, importance in zip(memories.contents, memories.importance):
+            if importance > 0.7:
+                context_parts += (_SEPARATOR, _MEMORY_HEADER, content)
         
-        # Recent context
-        for segment in self.recent_context:
-            context_parts.append(segment.content)
-        
-        context = "\n\n".join(context_parts)
+        if not context_parts:
+            return None
         
-        self.logger.info(f"Built context: {self._total_tokens()} tokens")
-        return context
+        # The first separator has nothing before it
+        return "".join(context_parts[1:])
     
     def get_character_context(self, character_name: str) -> str:
         """Get context specific to a character.
@@ -339,20 +626,17 @@ class ContextManager:
         """
         parts = []
         
-        # Character sheet
-        for segment in self.character_sheets:
-            if character_name in segment.characters:
-                parts.append(segment.content)
-        
-        # Relevant memories
-        for segment in self.memory_segments:
-            if character_name in segment.characters:
-                parts.append(segment.content)
+        # Character sheet and relevant memories
+        for store in (self.character_sheets, self.memory_segments):
+            contents = store.contents
+            parts.extend(contents[i] for i in store.indices_for(character_name))
         
         # Recent mentions
-        for segment in self.recent_context[-10:]:  # Last 10 messages
-            if character_name in segment.characters or character_name.lower() in segment.content.lower():
-                parts.append(segment.content)
+        recent = self.recent_context
+        name_lower = character_name.lower()
+        for i in range(max(0, len(recent) - 10), len(recent)):  # Last 10 messages
+            if character_name in recent.characters[i] or name_lower in recent.content_lower(i):
+                parts.append(recent.contents[i])
         
         return "\n\n".join(parts)
     
@@ -374,10 +658,10 @@ class ContextManager:
                 "summaries": len(self.summaries)
             },
             "tokens_by_type": {
-                "recent": sum(s.tokens for s in self.recent_context),
-                "characters": sum(s.tokens for s in self.character_sheets),
-                "world": sum(s.tokens for s in self.world_state),
-                "memories": sum(s.tokens for s in self.memory_segments),
-                "summaries": sum(s.tokens for s in self.summaries)
+                "recent": self.recent_context.total_tokens,
+                "characters": self.character_sheets.total_tokens,
+                "world": self.world_state.total_tokens,
+                "memories": self.memory_segments.total_tokens,
+                "summaries": self.summaries.total_tokens
             }
         }
\ No newline at end of file
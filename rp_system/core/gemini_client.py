@@ -1,15 +1,37 @@
 """Gemini API client with retry logic and comprehensive error handling."""
 
+import functools
 import logging
+import random
 import time
-from typing import Dict, Any, Optional, List
+from email.utils import parsedate_to_datetime
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, Optional, List, Callable, Iterator, TypeVar
 import os
+import re
 from dataclasses import dataclass
 import google.generativeai as genai
 from google.generativeai.types import HarmCategory, HarmBlockThreshold
 import requests
 
+try:
+    import tiktoken
+    TIKTOKEN_AVAILABLE = True
+except ImportError:
+    TIKTOKEN_AVAILABLE = False
 
+from .compat import add_slots
+
+T = TypeVar("T")
+
+# API error messages worth retrying
+_RETRYABLE_RE = re.compile(
+    r"rate limit|quota exceeded|service unavailable|internal error|timeout|connection error",
+    re.IGNORECASE
+)
+
+
+@add_slots
 @dataclass
 class GeminiResponse:
     """Response from Gemini API with metadata."""
@@ -55,12 +77,53 @@ class GeminiClient:
         self.base_delay = 1.0
         self.max_delay = 60.0
         
+        # Remote token counts for recently seen texts (failures are not cached)
+        self._count_tokens_cached = functools.lru_cache(maxsize=4096)(self._count_tokens_remote)
+        
+        # Generation configs reused across requests with the same settings
+        self._cached_generation_config = functools.lru_cache(maxsize=32)(self._make_generation_config)
+        
+        # Local BPE estimate used for budgeting when tiktoken is installed
+        self._encoder = None
+        if TIKTOKEN_AVAILABLE:
+            try:
+                self._encoder = tiktoken.get_encoding("cl100k_base")
+            except Exception as e:
+                self.logger.warning(f"Local token counter unavailable: {e}")
+        
         self.logger.info(f"Initialized Gemini client with model {self.model_name}")
     
     def _exponential_backoff(self, attempt: int) -> float:
-        """Calculate exponential backoff delay."""
-        delay = min(self.base_delay * (2 ** attempt), self.max_delay)
-        return delay
+        """Calculate exponential backoff delay with full jitter."""
+        return random.uniform(0, min(self.base_delay * (2 ** attempt), self.max_delay))
+    
+    def _retry_after(self, error: Exception) -> Optional[float]:
+        """Get the delay requested by a Retry-After header on the error's response.
+        
+        Args:
+            error: Error raised by the API call
+            
+        Returns:
+            Delay in seconds (at most max_delay), or None if no usable header
+        """
+        headers = getattr(getattr(error, "response", None), "headers", None)
+        if not headers:
+            return None
+        
+        value = headers.get("Retry-After")
+        if not value:
+            return None
+        
+        try:
+            delay = float(value)
+        except (TypeError, ValueError):
+            try:
+                retry_at = parsedate_to_datetime(value)
+            except (TypeError, ValueError, IndexError):
+                return None
+            delay = retry_at.timestamp() - time.time()
+        
+        return min(max(delay, 0.0), self.max_delay)
     
     def _is_retryable_error(self, error: Exception) -> bool:
         """Check if an error is retryable."""
@@ -71,19 +134,9 @@ class GeminiClient:
         )
         
         # Check for specific API errors
-        error_str = str(error).lower()
-        retryable_messages = [
-            "rate limit",
-            "quota exceeded", 
-            "service unavailable",
-            "internal error",
-            "timeout",
-            "connection error"
-        ]
-        
         return (
             isinstance(error, retryable_errors) or
-            any(msg in error_str for msg in retryable_messages)
+            _RETRYABLE_RE.search(str(error)) is not None
         )
     
     def generate_response(
@@ -109,55 +162,131 @@ class GeminiClient:
         Raises:
             Exception: If all retries fail
         """
-        generation_config = genai.types.GenerationConfig(
+        generation_config = self._generation_config(max_tokens, temperature, top_p, **kwargs)
+        
+        def attempt() -> GeminiResponse:
+            response = self.model.generate_content(
+                prompt,
+                generation_config=generation_config
+            )
+            
+            if not response.text:
+                raise ValueError("Empty response from Gemini")
+            
+            result = self._build_response(response)
+            self.logger.info(f"Generated response: {result.usage.get('total_tokens', 0)} tokens")
+            return result
+        
+        return self._with_retries(attempt)
+    
+    def generate_response_stream(
+        self,
+        prompt: str,
+        max_tokens: Optional[int] = None,
+        temperature: float = 0.7,
+        top_p: float = 0.95,
+        **kwargs
+    ) -> Iterator[str]:
+        """Stream a response from Gemini as it is generated.
+        
+        Retries cover starting the stream only; an error after text has been
+        yielded is raised to the caller.
+        
+        Args:
+            prompt: Input prompt
+            max_tokens: Maximum tokens to generate
+            temperature: Sampling temperature
+            top_p: Top-p sampling parameter
+            **kwargs: Additional generation parameters
+            
+        Yields:
+            Text chunks in order
+            
+        Returns:
+            GeminiResponse for the complete text, as the generator's return value
+            
+        Raises:
+            Exception: If all retries fail
+        """
+        generation_config = self._generation_config(max_tokens, temperature, top_p, **kwargs)
+        
+        response = self._with_retries(
+            lambda: self.model.generate_content(
+                prompt,
+                generation_config=generation_config,
+                stream=True
+            )
+        )
+        
+        for chunk in response:
+            if chunk.text:
+                yield chunk.text
+        
+        response.resolve()
+        result = self._build_response(response)
+        self.logger.info(f"Streamed response: {result.usage.get('total_tokens', 0)} tokens")
+        return result
+    
+    def _generation_config(
+        self,
+        max_tokens: Optional[int],
+        temperature: float,
+        top_p: float,
+        **kwargs
+    ) -> Any:
+        """Get the generation config for a request, reusing a cached one."""
+        try:
+            return self._cached_generation_config(
+                max_tokens, temperature, top_p, tuple(sorted(kwargs.items()))
+            )
+        except TypeError:
+            # Unhashable parameter values such as stop sequence lists
+            return self._make_generation_config(
+                max_tokens, temperature, top_p, tuple(kwargs.items())
+            )
+    
+    def _make_generation_config(
+        self,
+        max_tokens: Optional[int],
+        temperature: float,
+        top_p: float,
+        extra_params: tuple
+    ) -> Any:
+        """Build a generation config from request settings."""
+        return genai.types.GenerationConfig(
             max_output_tokens=max_tokens,
             temperature=temperature,
             top_p=top_p,
-            **kwargs
+            **dict(extra_params)
         )
+    
+    def _with_retries(self, operation: Callable[[], T]) -> T:
+        """Run an API call, retrying retryable errors with backoff.
         
+        Args:
+            operation: Callable making the API call
+            
+        Returns:
+            Result of the first successful call
+            
+        Raises:
+            Exception: If all retries fail
+        """
         last_exception = None
         
         for attempt in range(self.max_retries + 1):
             try:
                 self.logger.debug(f"Generating response (attempt {attempt + 1})")
-                
-                response = self.model.generate_content(
-                    prompt,
-                    generation_config=generation_config
-                )
-                
-                if not response.text:
-                    raise ValueError("Empty response from Gemini")
-                
-                # Extract metadata
-                usage = {}
-                if hasattr(response, 'usage_metadata'):
-                    usage = {
-                        'prompt_tokens': getattr(response.usage_metadata, 'prompt_token_count', 0),
-                        'completion_tokens': getattr(response.usage_metadata, 'candidates_token_count', 0),
-                        'total_tokens': getattr(response.usage_metadata, 'total_token_count', 0)
-                    }
-                
-                finish_reason = getattr(response.candidates[0], 'finish_reason', 'STOP') if response.candidates else 'STOP'
-                safety_ratings = [rating.__dict__ for rating in getattr(response.candidates[0], 'safety_ratings', [])] if response.candidates else []
-                
-                result = GeminiResponse(
-                    text=response.text,
-                    usage=usage,
-                    finish_reason=str(finish_reason),
-                    safety_ratings=safety_ratings
-                )
-                
-                self.logger.info(f"Generated response: {usage.get('total_tokens', 0)} tokens")
-                return result
+                return operation()
                 
             except Exception as e:
                 last_exception = e
                 self.logger.warning(f"Generation attempt {attempt + 1} failed: {e}")
                 
                 if attempt < self.max_retries and self._is_retryable_error(e):
-                    delay = self._exponential_backoff(attempt)
+                    delay = self._retry_after(e)
+                    if delay is None:
+                        delay = self._exponential_backoff(attempt)
                     self.logger.info(f"Retrying in {delay:.1f}s...")
                     time.sleep(delay)
                 else:
@@ -167,23 +296,76 @@ class GeminiClient:
         self.logger.error(f"All generation attempts failed. Last error: {last_exception}")
         raise last_exception
     
-    def count_tokens(self, text: str) -> int:
+    def _build_response(self, response: Any) -> GeminiResponse:
+        """Extract text and metadata from a completed Gemini response."""
+        usage = {}
+        if hasattr(response, 'usage_metadata'):
+            usage = {
+                'prompt_tokens': getattr(response.usage_metadata, 'prompt_token_count', 0),
+                'completion_tokens': getattr(response.usage_metadata, 'candidates_token_count', 0),
+                'total_tokens': getattr(response.usage_metadata, 'total_token_count', 0)
+            }
+        
+        finish_reason = getattr(response.candidates[0], 'finish_reason', 'STOP') if response.candidates else 'STOP'
+        safety_ratings = [rating.__dict__ for rating in getattr(response.candidates[0], 'safety_ratings', [])] if response.candidates else []
+        
+        return GeminiResponse(
+            text=response.text,
+            usage=usage,
+            finish_reason=str(finish_reason),
+            safety_ratings=safety_ratings
+        )
+    
+    def count_tokens(self, text: str, exact: bool = False, use_cache: bool = True) -> int:
         """Count tokens in text.
         
+        When tiktoken is installed the count is a local estimate, close enough
+        for context budgeting, and no API call is made unless exact is set.
+        
         Args:
             text: Text to count tokens for
+            exact: Ask the Gemini API for the exact count
+            use_cache: Reuse earlier API counts for the same text; health
+                checks pass False so they always reach the API
             
         Returns:
             Token count
         """
+        if self._encoder is not None and not exact:
+            return len(self._encoder.encode(text, disallowed_special=()))
+        
         try:
-            result = self.model.count_tokens(text)
-            return result.total_tokens
+            if not use_cache:
+                return self._count_tokens_remote(text)
+            return self._count_tokens_cached(text)
         except Exception as e:
             self.logger.warning(f"Token counting failed: {e}")
+            if self._encoder is not None:
+                return len(self._encoder.encode(text, disallowed_special=()))
             # Fallback estimate: ~4 characters per token
             return len(text) // 4
     
+    def count_tokens_batch(self, texts: List[str], workers: int = 8, exact: bool = False) -> List[int]:
+        """Count tokens for many texts, running API calls concurrently.
+        
+        Args:
+            texts: Texts to count tokens for
+            workers: Maximum number of concurrent API calls
+            exact: Ask the Gemini API for exact counts
+            
+        Returns:
+            Token counts in the same order as texts
+        """
+        if len(texts) <= 1 or (self._encoder is not None and not exact):
+            return [self.count_tokens(text, exact) for text in texts]
+        
+        with ThreadPoolExecutor(max_workers=min(workers, len(texts))) as executor:
+            return list(executor.map(functools.partial(self.count_tokens, exact=exact), texts))
+    
+    def _count_tokens_remote(self, text: str) -> int:
+        """Count tokens with the Gemini API."""
+        return self.model.count_tokens(text).total_tokens
+    
     def is_healthy(self, timeout: int = 10) -> bool:
         """Check if the Gemini API is accessible.
         
@@ -200,7 +382,7 @@ class GeminiClient:
             
             # Try a simple token count - this validates API connection
             test_text = "Hello"
-            token_count = self.count_tokens(test_text)
+            token_count = self.count_tokens(test_text, exact=True, use_cache=False)
             
             # Token count should be positive for valid API
             return token_count > 0
@@ -1,21 +1,58 @@
 """Long-term memory system with hierarchical storage and summarization."""
 
-import logging
 import json
-import pickle
-from typing import Dict, List, Any, Optional, Tuple
-from dataclasses import dataclass, asdict
-from datetime import datetime, timedelta
+import logging
+import os
+import shutil
+from typing import Dict, List, Any, Optional, Set, Tuple, Iterable, Iterator, Callable, Deque
+from dataclasses import dataclass, field
+from datetime import datetime
 from pathlib import Path
+from collections import Counter, deque
+from contextlib import contextmanager
 import re
+import functools
 import hashlib
+import heapq
+import itertools
+import threading
+import time
+
+from .compat import add_slots
+from .storage import atomic_write_bytes, dumps_json, load_json_file
+
+# Common RP tags and the words that imply them
+_TAG_WORDS = {
+    'combat': 'fight|battle|combat|attack',
+    'romance': 'love|romance|kiss|hug|affection',
+    'death': 'death|die|dead|kill|murder',
+    'magic': 'magic|spell|power|ability',
+    'travel': 'travel|journey|move|go',
+    'mystery': 'secret|hidden|mystery',
+    'fear': 'fear|scared|afraid|terror',
+    'joy': 'happy|joy|laugh|smile',
+    'sadness': 'sad|cry|tears|sorrow',
+    'anger': 'angry|rage|fury|mad'
+}
+_TAG_NAMES = tuple(_TAG_WORDS)
 
+# Every tag word is a whole word, so one pass over the words with a dict
+# lookup finds all tags without trying each alternative at every position
+_TAG_BY_WORD = {
+    word: tag
+    for tag, words in _TAG_WORDS.items()
+    for word in words.split("|")
+}
+_WORD_RE = re.compile(r"\w+")
 
+
+
+@add_slots
 @dataclass
 class MemoryEntry:
     """A single memory entry with metadata."""
     content: str
-    timestamp: datetime
+    timestamp: float  # time.time() when the memory was recorded
     importance: float
     characters: List[str]
     emotions: List[str]
@@ -23,11 +60,27 @@ class MemoryEntry:
     context_hash: str
     summary: Optional[str] = None
     
+    # Lowercased content and summary for text queries, filled on first use
+    _content_lower: Optional[str] = field(default=None, compare=False, repr=False)
+    _summary_lower: Optional[str] = field(default=None, compare=False, repr=False)
+    
+    def content_lower(self) -> str:
+        """Get the lowercased content, caching it."""
+        if self._content_lower is None:
+            self._content_lower = self.content.lower()
+        return self._content_lower
+    
+    def summary_lower(self) -> str:
+        """Get the lowercased summary (empty if there is none), caching it."""
+        if self._summary_lower is None:
+            self._summary_lower = self.summary.lower() if self.summary else ""
+        return self._summary_lower
+    
     def to_dict(self) -> Dict[str, Any]:
         """Convert to dictionary for serialization."""
         return {
             "content": self.content,
-            "timestamp": self.timestamp.isoformat(),
+            "timestamp": self.timestamp,
             "importance": self.importance,
             "characters": self.characters,
             "emotions": self.emotions,
@@ -39,9 +92,14 @@ class MemoryEntry:
     @classmethod
     def from_dict(cls, data: Dict[str, Any]) -> "MemoryEntry":
         """Create from dictionary."""
+        timestamp = data["timestamp"]
+        if isinstance(timestamp, str):
+            # Files saved before timestamps were stored as epoch seconds
+            timestamp = datetime.fromisoformat(timestamp).timestamp()
+        
         return cls(
             content=data["content"],
-            timestamp=datetime.fromisoformat(data["timestamp"]),
+            timestamp=timestamp,
             importance=data["importance"],
             characters=data["characters"],
             emotions=data["emotions"],
@@ -51,32 +109,117 @@ class MemoryEntry:
         )
 
 
+@functools.lru_cache(maxsize=2048)
+def _content_tags(content_lower: str) -> Tuple[str, ...]:
+    """Get the tags implied by lowercased content, cached for repeated text."""
+    found = {_TAG_BY_WORD.get(word) for word in _WORD_RE.findall(content_lower)}
+    return tuple(tag for tag in _TAG_NAMES if tag in found)
+
+
+def _content_hash(text: str) -> str:
+    """Hash text for duplicate detection (128-bit BLAKE2b, hex encoded)."""
+    return hashlib.blake2b(text.encode(), digest_size=16).hexdigest()
+
+
+def _split_top(
+    memories: List[MemoryEntry],
+    count: int,
+    key: Callable[[MemoryEntry], Any]
+) -> Tuple[List[MemoryEntry], List[MemoryEntry]]:
+    """Split memories into the top ones by a key and the rest.
+    
+    Args:
+        memories: Memories to split
+        count: Number of top memories to keep
+        key: Sort key; higher values rank first
+        
+    Returns:
+        Top memories, highest first, and the rest in their original order
+    """
+    # Ranking positions keeps ties in list order, like a stable sort
+    top = heapq.nlargest(count, range(len(memories)), key=lambda i: key(memories[i]))
+    top_set = set(top)
+    rest = [memory for i, memory in enumerate(memories) if i not in top_set]
+    return [memories[i] for i in top], rest
+
+
 class MemorySystem:
     """Hierarchical memory system for long-term RP context preservation."""
     
-    def __init__(self, storage_path: Optional[str] = None):
+    # Logged additions between full snapshots of memories.json
+    SNAPSHOT_INTERVAL = 32
+    
+    def __init__(
+        self,
+        storage_path: Optional[str] = None,
+        pretty: bool = False,
+        save_interval: Optional[float] = 2.0
+    ):
         """Initialize memory system.
         
         Args:
             storage_path: Path to store memory files
+            pretty: Whether to indent memories.json for human inspection
+            save_interval: Seconds a background thread waits to batch changes
+                before saving, or None to save after every change
         """
         self.storage_path = Path(storage_path) if storage_path else Path("rp_memory")
         self.storage_path.mkdir(exist_ok=True)
         
         self.logger = logging.getLogger(__name__)
+        self.pretty = pretty
         
         # Memory stores
-        self.recent_memories: List[MemoryEntry] = []  # Last 24 hours
+        self.recent_memories: Deque[MemoryEntry] = deque()  # Last 24 hours, oldest first
         self.important_memories: List[MemoryEntry] = []  # High importance
         self.character_memories: Dict[str, List[MemoryEntry]] = {}  # Per character
         self.summaries: List[MemoryEntry] = []  # Compressed memories
         
+        # Context hash -> number of places it is held in the recent, important
+        # and summary stores, for duplicate checks without scanning them
+        self._hash_index: Dict[str, int] = {}
+        
+        # Each retrievable memory gets an id when its hash is first indexed;
+        # ids increase, so sorting them gives insertion order
+        self._memory_ids: Dict[str, int] = {}
+        self._memories_by_id: Dict[int, MemoryEntry] = {}
+        self._next_memory_id = itertools.count()
+        
+        # Context hash -> times the memory was returned by retrieve_memories;
+        # the least used summaries are evicted first
+        self._use_counts: Counter = Counter()
+        
+        # Inverted indexes: character, tag or emotion -> ids of memories
+        self._by_character: Dict[str, Set[int]] = {}
+        self._by_tag: Dict[str, Set[int]] = {}
+        self._by_emotion: Dict[str, Set[int]] = {}
+        
         # Configuration
         self.max_recent_memories = 100
         self.max_important_memories = 50
         self.max_character_memories = 30
+        self.max_summaries = 500
         self.importance_threshold = 0.7
         
+        # Save batching; the lock guards the stores against the saver thread
+        self.save_interval = save_interval
+        self._lock = threading.RLock()
+        self._save_lock = threading.Lock()
+        self._dirty = False
+        self._save_suspended = 0
+        self._wake_saver = threading.Event()
+        self._closing = threading.Event()
+        self._saver: Optional[threading.Thread] = None
+        
+        # Append-only log of additions since the last snapshot; a snapshot
+        # moves it aside until memories.json is written, and records carry
+        # a sequence number so ones the snapshot covers are not replayed
+        self._log_path = self.storage_path / "memories.log"
+        self._old_log_path = self.storage_path / "memories.log.old"
+        self._log = None
+        self._log_seq = 0
+        self._logged_since_snapshot = 0
+        
         # Load existing memories
         self._load_memories()
         
@@ -105,33 +248,78 @@ class MemorySystem:
             Created memory entry
         """
         # Create context hash for duplicate detection
-        context_hash = hashlib.md5(
-            (content + (context or "")).encode()
-        ).hexdigest()
-        
-        # Check for duplicates
-        if self._is_duplicate(context_hash):
-            self.logger.debug("Skipping duplicate memory")
-            return None
-        
-        memory = MemoryEntry(
-            content=content,
-            timestamp=datetime.now(),
-            importance=importance,
-            characters=characters or [],
-            emotions=emotions or [],
-            tags=tags or [],
-            context_hash=context_hash
-        )
+        context_hash = _content_hash(content + (context or ""))
+        
+        with self._lock:
+            # Check for duplicates
+            if self._is_duplicate(context_hash):
+                self.logger.debug("Skipping duplicate memory")
+                return None
+            
+            memory = MemoryEntry(
+                content=content,
+                timestamp=time.time(),
+                importance=importance,
+                characters=characters or [],
+                emotions=emotions or [],
+                tags=tags or [],
+                context_hash=context_hash
+            )
+            
+            # Auto-tag based on content; the lowercased copy is kept for queries
+            memory.tags.extend(_content_tags(memory.content_lower()))
+            
+            self._store_memory(memory)
+            self._log_memory(memory)
+            snapshot_due = self._logged_since_snapshot >= self.SNAPSHOT_INTERVAL
+        
+        # Auto-save; until a snapshot is due the log holds the addition
+        if snapshot_due:
+            self._save_memories()
+        
+        self.logger.debug(f"Added memory: {len(content)} chars, importance {importance}")
+        return memory
+    
+    def add_memories(self, items: Iterable[Dict[str, Any]]) -> List[Optional[MemoryEntry]]:
+        """Add many memories, trimming and saving once.
         
-        # Auto-tag based on content
-        memory.tags.extend(self._extract_tags(content))
+        Args:
+            items: Keyword arguments for add_memory, one dict per memory
+            
+        Returns:
+            Created memory entries in input order, None for duplicates
+        """
+        with self.bulk_update():
+            return [self.add_memory(**item) for item in items]
+    
+    @contextmanager
+    def bulk_update(self) -> Iterator["MemorySystem"]:
+        """Defer trimming and saving until a batch of additions is complete.
         
-        # Add to appropriate stores
+        Nested blocks are allowed; stores are trimmed and saved once when
+        the outermost block exits.
+        """
+        with self._lock:
+            self._save_suspended += 1
+        try:
+            yield self
+        finally:
+            with self._lock:
+                self._save_suspended -= 1
+                finished = self._save_suspended == 0
+                if finished:
+                    self._trim_memories()
+            if finished and self._dirty:
+                self._save_memories()
+    
+    def _store_memory(self, memory: MemoryEntry) -> None:
+        """Add a new memory to the stores it belongs in."""
         self.recent_memories.append(memory)
+        self._index_hashes((memory,))
         
-        if importance >= self.importance_threshold:
+        if memory.importance >= self.importance_threshold:
             self.important_memories.append(memory)
+            self._index_hashes((memory,))
         
         # Add to character-specific memories
         for character in memory.characters:
@@ -139,86 +327,184 @@ class MemorySystem:
                 self.character_memories[character] = []
             self.character_memories[character].append(memory)
         
-        # Maintain memory limits
-        self._trim_memories()
-        
-        # Auto-save
-        self._save_memories()
+        # Maintain memory limits; a bulk update trims once at the end
+        if not self._save_suspended:
+            self._trim_memories()
+    
+    def _log_memory(self, memory: MemoryEntry) -> None:
+        """Append an added memory to the log."""
+        self._log_seq += 1
+        self._logged_since_snapshot += 1
+        try:
+            if self._log is None:
+                self._log = open(self._log_path, "ab", buffering=0)
+            self._log.write(dumps_json({"seq": self._log_seq, "entry": memory.to_dict()}, default=None) + b"\n")
+        except Exception as e:
+            self.logger.error(f"Failed to log memory: {e}")
+            # Only a snapshot can save it now
+            self._dirty = True
+    
+    def _rotate_log(self) -> None:
+        """Move the log aside for a snapshot that covers its records."""
+        if self._log is not None:
+            self._log.close()
+            self._log = None
+        if not self._log_path.exists():
+            return
         
-        self.logger.debug(f"Added memory: {len(content)} chars, importance {importance}")
-        return memory
+        # A failed snapshot leaves the old log in place; keep both
+        if self._old_log_path.exists():
+            with open(self._old_log_path, "ab") as dst, open(self._log_path, "rb") as src:
+                shutil.copyfileobj(src, dst)
+            self._log_path.unlink()
+        else:
+            os.replace(self._log_path, self._old_log_path)
     
     def _is_duplicate(self, context_hash: str) -> bool:
         """Check if memory is duplicate based on context hash."""
-        all_memories = (
-            self.recent_memories + 
-            self.important_memories + 
-            self.summaries
-        )
+        return context_hash in self._hash_index
+    
+    def _index_hashes(self, memories: Iterable[MemoryEntry]) -> None:
+        """Count memories added to a store in the hash index."""
+        hash_index = self._hash_index
+        for memory in memories:
+            count = hash_index.get(memory.context_hash, 0)
+            hash_index[memory.context_hash] = count + 1
+            if not count:
+                self._index_memory(memory)
+    
+    def _unindex_hashes(self, memories: Iterable[MemoryEntry]) -> None:
+        """Uncount memories removed from a store in the hash index."""
+        hash_index = self._hash_index
+        for memory in memories:
+            count = hash_index[memory.context_hash] - 1
+            if count:
+                hash_index[memory.context_hash] = count
+            else:
+                del hash_index[memory.context_hash]
+                self._unindex_memory(memory)
+    
+    def _index_memory(self, memory: MemoryEntry) -> None:
+        """Give a newly retrievable memory an id and add it to the inverted indexes."""
+        memory_id = next(self._next_memory_id)
+        self._memory_ids[memory.context_hash] = memory_id
+        self._memories_by_id[memory_id] = memory
+        
+        for index, keys in (
+            (self._by_character, memory.characters),
+            (self._by_tag, memory.tags),
+            (self._by_emotion, memory.emotions)
+        ):
+            for key in keys:
+                index.setdefault(key, set()).add(memory_id)
+    
+    def _unindex_memory(self, memory: MemoryEntry) -> None:
+        """Remove a memory that is no longer retrievable from the indexes."""
+        memory_id = self._memory_ids.pop(memory.context_hash)
+        indexed = self._memories_by_id.pop(memory_id)
+        self._use_counts.pop(memory.context_hash, None)
+        
+        for index, keys in (
+            (self._by_character, indexed.characters),
+            (self._by_tag, indexed.tags),
+            (self._by_emotion, indexed.emotions)
+        ):
+            for key in keys:
+                ids = index.get(key)
+                if ids is not None:
+                    ids.discard(memory_id)
+                    if not ids:
+                        del index[key]
+    
+    def _candidate_memories(
+        self,
+        characters: Optional[List[str]],
+        tags: Optional[List[str]],
+        emotions: Optional[List[str]]
+    ) -> Iterable[MemoryEntry]:
+        """Get retrievable memories matching any of each given filter list.
         
-        for memory in all_memories:
-            if memory.context_hash == context_hash:
-                return True
-        return False
+        Args:
+            characters: Characters to filter by
+            tags: Tags to filter by
+            emotions: Emotions to filter by
+            
+        Returns:
+            Matching memories in insertion order
+        """
+        candidate_ids: Optional[Set[int]] = None
+        for index, keys in (
+            (self._by_character, characters),
+            (self._by_tag, tags),
+            (self._by_emotion, emotions)
+        ):
+            if not keys:
+                continue
+            ids = set().union(*(index.get(key, ()) for key in keys))
+            candidate_ids = ids if candidate_ids is None else candidate_ids & ids
+        
+        if candidate_ids is None:
+            return self._memories_by_id.values()
+        return [self._memories_by_id[i] for i in sorted(candidate_ids)]
     
     def _extract_tags(self, content: str) -> List[str]:
         """Extract tags from content using pattern matching."""
-        tags = []
-        
-        # Common RP tags
-        tag_patterns = {
-            r'\b(fight|battle|combat|attack)\b': 'combat',
-            r'\b(love|romance|kiss|hug|affection)\b': 'romance',
-            r'\b(death|die|dead|kill|murder)\b': 'death',
-            r'\b(magic|spell|power|ability)\b': 'magic',
-            r'\b(travel|journey|move|go)\b': 'travel',
-            r'\b(secret|hidden|mystery)\b': 'mystery',
-            r'\b(fear|scared|afraid|terror)\b': 'fear',
-            r'\b(happy|joy|laugh|smile)\b': 'joy',
-            r'\b(sad|cry|tears|sorrow)\b': 'sadness',
-            r'\b(angry|rage|fury|mad)\b': 'anger'
-        }
-        
-        content_lower = content.lower()
-        for pattern, tag in tag_patterns.items():
-            if re.search(pattern, content_lower):
-                tags.append(tag)
-        
-        return tags
+        return list(_content_tags(content.lower()))
     
     def _trim_memories(self) -> None:
         """Trim memory stores to maintain limits."""
         # Trim recent memories by time and count
-        cutoff = datetime.now() - timedelta(hours=24)
-        self.recent_memories = [
-            m for m in self.recent_memories 
-            if m.timestamp > cutoff
-        ]
-        
-        if len(self.recent_memories) > self.max_recent_memories:
-            self.recent_memories.sort(key=lambda x: x.timestamp, reverse=True)
+        # Memories are appended in time order, so expired and excess ones are
+        # all at the left end
+        recent = self.recent_memories
+        cutoff = time.time() - 24 * 3600
+        expired = []
+        while recent and recent[0].timestamp <= cutoff:
+            expired.append(recent.popleft())
+        self._unindex_hashes(expired)
+        
+        if len(recent) > self.max_recent_memories:
             # Move excess to summaries if important enough
-            excess = self.recent_memories[self.max_recent_memories:]
-            self.recent_memories = self.recent_memories[:self.max_recent_memories]
+            excess = [recent.popleft() for _ in range(len(recent) - self.max_recent_memories)]
             
             for memory in excess:
                 if memory.importance > 0.5:
                     self.summaries.append(memory)
+            
+            # Memories moved to summaries stay indexed
+            self._unindex_hashes(m for m in excess if m.importance <= 0.5)
         
         # Trim important memories
         if len(self.important_memories) > self.max_important_memories:
-            self.important_memories.sort(key=lambda x: x.importance, reverse=True)
-            excess = self.important_memories[self.max_important_memories:]
-            self.important_memories = self.important_memories[:self.max_important_memories]
+            self.important_memories, excess = _split_top(
+                self.important_memories,
+                self.max_important_memories,
+                lambda x: x.importance
+            )
             
             self.summaries.extend(excess)
         
+        # Evict the least used summaries, oldest first among equals
+        if len(self.summaries) > self.max_summaries:
+            summaries = self.summaries
+            use_counts = self._use_counts
+            evicted = set(heapq.nsmallest(
+                len(summaries) - self.max_summaries,
+                range(len(summaries)),
+                key=lambda i: use_counts[summaries[i].context_hash]
+            ))
+            self.summaries = [m for i, m in enumerate(summaries) if i not in evicted]
+            self._unindex_hashes(summaries[i] for i in evicted)
+        
         # Trim character memories
         for character in self.character_memories:
             memories = self.character_memories[character]
             if len(memories) > self.max_character_memories:
-                memories.sort(key=lambda x: (x.importance, x.timestamp), reverse=True)
-                self.character_memories[character] = memories[:self.max_character_memories]
+                self.character_memories[character] = heapq.nlargest(
+                    self.max_character_memories,
+                    memories,
+                    key=lambda x: (x.importance, x.timestamp)
+                )
     
     def retrieve_memories(
         self,
@@ -242,54 +528,40 @@ class MemorySystem:
         Returns:
             List of matching memories
         """
-        all_memories = (
-            self.recent_memories + 
-            self.important_memories + 
-            self.summaries
-        )
-        
-        # Remove duplicates by hash
-        seen_hashes = set()
-        unique_memories = []
-        for memory in all_memories:
-            if memory.context_hash not in seen_hashes:
-                unique_memories.append(memory)
-                seen_hashes.add(memory.context_hash)
-        
-        # Apply filters
-        filtered = []
-        for memory in unique_memories:
-            if memory.importance < min_importance:
-                continue
-            
-            if characters and not any(char in memory.characters for char in characters):
-                continue
-            
-            if tags and not any(tag in memory.tags for tag in tags):
-                continue
-            
-            if emotions and not any(emotion in memory.emotions for emotion in emotions):
-                continue
-            
-            if query:
-                query_lower = query.lower()
-                content_lower = memory.content.lower()
-                if query_lower not in content_lower:
+        query_lower = query.lower()
+        now = time.time()
+        
+        # The lock keeps adds and evictions on other threads from changing
+        # the indexes mid-scan and from losing use counts
+        with self._lock:
+            # The inverted indexes narrow the search to memories passing the
+            # character, tag and emotion filters; filter the rest and score
+            filtered = []
+            scores = []
+            for memory in self._candidate_memories(characters, tags, emotions):
+                if memory.importance < min_importance:
+                    continue
+                
+                # Content matching uses the entry's cached lowercase copy
+                if query_lower and query_lower not in memory.content_lower():
                     # Also check summary if available
-                    if memory.summary and query_lower not in memory.summary.lower():
+                    if memory.summary and query_lower not in memory.summary_lower():
                         continue
+                
+                # Relevance is importance plus recency decaying over a week
+                age_factor = 1.0 - ((now - memory.timestamp) / 3600) / (24 * 7)
+                if age_factor < 0.1:
+                    age_factor = 0.1
+                filtered.append(memory)
+                scores.append(memory.importance * 0.7 + age_factor * 0.3)
             
-            filtered.append(memory)
-        
-        # Sort by relevance (importance + recency)
-        def relevance_score(memory: MemoryEntry) -> float:
-            age_hours = (datetime.now() - memory.timestamp).total_seconds() / 3600
-            age_factor = max(0.1, 1.0 - (age_hours / (24 * 7)))  # Decay over week
-            return memory.importance * 0.7 + age_factor * 0.3
-        
-        filtered.sort(key=relevance_score, reverse=True)
+            # Rank by the precomputed scores, so no key function runs per memory
+            top = heapq.nlargest(limit, range(len(filtered)), key=scores.__getitem__)
+            
+            results = [filtered[i] for i in top]
+            self._use_counts.update(memory.context_hash for memory in results)
         
-        return filtered[:limit]
+        return results
     
     def get_character_memories(self, character: str, limit: int = 10) -> List[MemoryEntry]:
         """Get memories specific to a character.
@@ -304,10 +576,10 @@ class MemorySystem:
         if character not in self.character_memories:
             return []
         
-        memories = self.character_memories[character]
-        memories.sort(key=lambda x: (x.importance, x.timestamp), reverse=True)
-        
-        return memories[:limit]
+        with self._lock:
+            memories = self.character_memories[character]
+            memories.sort(key=lambda x: (x.importance, x.timestamp), reverse=True)
+            return memories[:limit]
     
     def summarize_memories(
         self,
@@ -326,9 +598,18 @@ class MemorySystem:
         if not memories:
             return ""
         
-        # Group by importance and recency
-        high_importance = [m for m in memories if m.importance > 0.7]
-        recent = [m for m in memories if (datetime.now() - m.timestamp).days < 1]
+        # Group by importance and recency and collect characters in one pass;
+        # only the first few of each group are shown
+        high_importance = []
+        recent = []
+        all_characters = set()
+        recent_cutoff = time.time() - 24 * 3600
+        for memory in memories:
+            if memory.importance > 0.7 and len(high_importance) < 5:
+                high_importance.append(memory)
+            if memory.timestamp > recent_cutoff and len(recent) < 3:
+                recent.append(memory)
+            all_characters.update(memory.characters)
         
         # Build summary sections
         summary_parts = []
@@ -346,10 +627,6 @@ class MemorySystem:
             summary_parts.append("Recent Events:\n" + "\n".join(recent_events))
         
         # Character relationships
-        all_characters = set()
-        for memory in memories:
-            all_characters.update(memory.characters)
-        
         if all_characters:
             summary_parts.append(f"Characters involved: {', '.join(sorted(all_characters))}")
         
@@ -370,92 +647,205 @@ class MemorySystem:
         Returns:
             Number of memories compressed
         """
-        cutoff = datetime.now() - timedelta(days=days_old)
-        
-        # Find old memories
-        old_memories = []
-        
-        # Check recent memories
-        recent_old = [m for m in self.recent_memories if m.timestamp < cutoff]
-        self.recent_memories = [m for m in self.recent_memories if m.timestamp >= cutoff]
-        old_memories.extend(recent_old)
-        
-        # Don't compress important memories or summaries
+        now = time.time()
+        cutoff = now - days_old * 24 * 3600
         
-        if old_memories:
-            # Create summary
-            summary_text = self.summarize_memories(old_memories)
+        with self._lock:
+            # Find old memories
+            old_memories = []
             
-            # Create summary memory entry
-            summary_memory = MemoryEntry(
-                content=f"[COMPRESSED SUMMARY - {len(old_memories)} memories from {cutoff.date()}]\n{summary_text}",
-                timestamp=datetime.now(),
-                importance=0.6,
-                characters=list(set().union(*[m.characters for m in old_memories])),
-                emotions=list(set().union(*[m.emotions for m in old_memories])),
-                tags=["summary"] + list(set().union(*[m.tags for m in old_memories])),
-                context_hash=hashlib.md5(summary_text.encode()).hexdigest(),
-                summary=summary_text
-            )
+            # Check recent memories; they are in time order, oldest first
+            recent = self.recent_memories
+            while recent and recent[0].timestamp < cutoff:
+                old_memories.append(recent.popleft())
+            self._unindex_hashes(old_memories)
             
-            self.summaries.append(summary_memory)
+            # Don't compress important memories or summaries
             
+            if old_memories:
+                # Create summary
+                summary_text = self.summarize_memories(old_memories)
+                
+                characters, emotions, tags = set(), set(), set()
+                for memory in old_memories:
+                    characters.update(memory.characters)
+                    emotions.update(memory.emotions)
+                    tags.update(memory.tags)
+                
+                # Create summary memory entry
+                summary_memory = MemoryEntry(
+                    content=f"[COMPRESSED SUMMARY - {len(old_memories)} memories from {datetime.fromtimestamp(cutoff).date()}]\n{summary_text}",
+                    timestamp=now,
+                    importance=0.6,
+                    characters=list(characters),
+                    emotions=list(emotions),
+                    tags=["summary"] + list(tags),
+                    context_hash=_content_hash(summary_text),
+                    summary=summary_text
+                )
+                
+                self.summaries.append(summary_memory)
+                self._index_hashes((summary_memory,))
+        
+        if old_memories:
             self.logger.info(f"Compressed {len(old_memories)} old memories into summary")
             self._save_memories()
-            
-            return len(old_memories)
         
-        return 0
+        return len(old_memories)
     
     def _save_memories(self) -> None:
-        """Save memories to disk."""
-        try:
-            memory_data = {
-                "recent": [m.to_dict() for m in self.recent_memories],
-                "important": [m.to_dict() for m in self.important_memories],
-                "summaries": [m.to_dict() for m in self.summaries],
-                "characters": {
-                    char: [m.to_dict() for m in memories]
-                    for char, memories in self.character_memories.items()
-                }
-            }
-            
-            with open(self.storage_path / "memories.json", "w") as f:
-                json.dump(memory_data, f, indent=2, default=str)
+        """Mark memories dirty and save now or on the background thread."""
+        with self._lock:
+            self._dirty = True
+            if self._save_suspended:
+                return
+            if self.save_interval is not None and not self._closing.is_set():
+                if self._saver is None:
+                    self._saver = threading.Thread(
+                        target=self._save_loop,
+                        name="memory-saver",
+                        daemon=True
+                    )
+                    self._saver.start()
+                self._wake_saver.set()
+                return
+        
+        self.flush()
+    
+    def _save_loop(self) -> None:
+        """Save dirty memories at most once per save interval until closed."""
+        while not self._closing.is_set():
+            self._wake_saver.wait()
+            self._wake_saver.clear()
             
-            self.logger.debug("Saved memories to disk")
+            # Let changes made in the meantime share this write
+            self._closing.wait(self.save_interval)
+            self.flush()
+    
+    def flush(self) -> None:
+        """Write pending memory changes to disk."""
+        with self._save_lock:
+            with self._lock:
+                # A bulk update saves when it completes
+                if not self._dirty or self._save_suspended:
+                    return
+                
+                # Each entry is saved once, keyed by its context hash, and the
+                # stores list keys; an entry re-added after leaving the
+                # deduplicated stores can share a hash with one a character
+                # still holds, so later entries with a taken hash get a suffix
+                entries: Dict[str, Dict[str, Any]] = {}
+                keys: Dict[int, str] = {}
+                
+                def entry_keys(memories: Iterable[MemoryEntry]) -> List[str]:
+                    result = []
+                    for memory in memories:
+                        key = keys.get(id(memory))
+                        if key is None:
+                            key = memory.context_hash
+                            if key in entries:
+                                key = f"{memory.context_hash}:{len(entries)}"
+                            keys[id(memory)] = key
+                            entries[key] = memory.to_dict()
+                        result.append(key)
+                    return result
+                
+                memory_data = {
+                    "recent": entry_keys(self.recent_memories),
+                    "important": entry_keys(self.important_memories),
+                    "summaries": entry_keys(self.summaries),
+                    "characters": {
+                        char: entry_keys(memories)
+                        for char, memories in self.character_memories.items()
+                    },
+                    "entries": entries,
+                    "log_seq": self._log_seq
+                }
+                self._dirty = False
+                self._logged_since_snapshot = 0
+                self._rotate_log()
             
-        except Exception as e:
-            self.logger.error(f"Failed to save memories: {e}")
+            try:
+                atomic_write_bytes(
+                    self.storage_path / "memories.json",
+                    dumps_json(memory_data, self.pretty, default=None)
+                )
+                if self._old_log_path.exists():
+                    self._old_log_path.unlink()
+                self.logger.debug("Saved memories to disk")
+                
+            except Exception as e:
+                self.logger.error(f"Failed to save memories: {e}")
+                with self._lock:
+                    self._dirty = True
+    
+    def close(self) -> None:
+        """Stop the background saver, snapshot pending changes and close the log."""
+        self._closing.set()
+        self._wake_saver.set()
+        if self._saver is not None:
+            self._saver.join()
+            self._saver = None
+        
+        with self._lock:
+            if self._logged_since_snapshot:
+                self._dirty = True
+        self.flush()
+        
+        with self._lock:
+            if self._log is not None:
+                self._log.close()
+                self._log = None
     
     def _load_memories(self) -> None:
         """Load memories from disk."""
         memory_file = self.storage_path / "memories.json"
         
-        if not memory_file.exists():
-            return
+        if memory_file.exists():
+            self._load_snapshot(memory_file)
         
+        self._replay_log()
+    
+    def _load_snapshot(self, memory_file: Path) -> None:
+        """Load the stores saved in memories.json."""
         try:
-            with open(memory_file) as f:
-                memory_data = json.load(f)
-            
-            self.recent_memories = [
-                MemoryEntry.from_dict(m) for m in memory_data.get("recent", [])
-            ]
+            memory_data = load_json_file(memory_file)
             
-            self.important_memories = [
-                MemoryEntry.from_dict(m) for m in memory_data.get("important", [])
-            ]
+            if "entries" in memory_data:
+                entries = {
+                    key: MemoryEntry.from_dict(data)
+                    for key, data in memory_data["entries"].items()
+                }
+                
+                def resolve(keys: List[str]) -> List[MemoryEntry]:
+                    return [entries[key] for key in keys]
+            else:
+                # Older saves hold a full copy of an entry for every store
+                def resolve(memories: List[Dict[str, Any]]) -> List[MemoryEntry]:
+                    return [MemoryEntry.from_dict(m) for m in memories]
             
-            self.summaries = [
-                MemoryEntry.from_dict(m) for m in memory_data.get("summaries", [])
-            ]
+            # Older saves may list recent memories newest first
+            self.recent_memories = deque(sorted(
+                resolve(memory_data.get("recent", [])),
+                key=lambda m: m.timestamp
+            ))
+            self.important_memories = resolve(memory_data.get("important", []))
+            self.summaries = resolve(memory_data.get("summaries", []))
+            self.character_memories = {
+                char: resolve(memories)
+                for char, memories in memory_data.get("characters", {}).items()
+            }
             
-            self.character_memories = {}
-            for char, memories in memory_data.get("characters", {}).items():
-                self.character_memories[char] = [
-                    MemoryEntry.from_dict(m) for m in memories
-                ]
+            self._hash_index = {}
+            self._memory_ids = {}
+            self._memories_by_id = {}
+            self._by_character = {}
+            self._by_tag = {}
+            self._by_emotion = {}
+            self._index_hashes(self.recent_memories)
+            self._index_hashes(self.important_memories)
+            self._index_hashes(self.summaries)
+            self._log_seq = memory_data.get("log_seq", 0)
             
             self.logger.info(f"Loaded {len(self.recent_memories)} recent, "
                            f"{len(self.important_memories)} important, "
@@ -464,6 +854,37 @@ class MemorySystem:
         except Exception as e:
             self.logger.error(f"Failed to load memories: {e}")
     
+    def _replay_log(self) -> None:
+        """Re-add memories logged after the last snapshot."""
+        snapshot_seq = self._log_seq
+        replayed = 0
+        
+        for log_path in (self._old_log_path, self._log_path):
+            if not log_path.exists():
+                continue
+            try:
+                with open(log_path, "rb") as f:
+                    for line in f:
+                        if not line.strip():
+                            continue
+                        record = json.loads(line)
+                        if record["seq"] <= snapshot_seq:
+                            continue
+                        self._log_seq = max(self._log_seq, record["seq"])
+                        
+                        memory = MemoryEntry.from_dict(record["entry"])
+                        if not self._is_duplicate(memory.context_hash):
+                            self._store_memory(memory)
+                            replayed += 1
+                
+            except Exception as e:
+                # A torn final record is expected after a crash
+                self.logger.error(f"Failed to replay memory log {log_path.name}: {e}")
+        
+        if replayed:
+            self._logged_since_snapshot = replayed
+            self.logger.info(f"Replayed {replayed} logged memories")
+    
     def get_stats(self) -> Dict[str, Any]:
         """Get memory system statistics.
         
@@ -1,15 +1,58 @@
 """Smart web search integration for contextual RP enhancement."""
 
+import asyncio
+import functools
 import logging
+import threading
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import json
 import time
-from typing import Dict, List, Any, Optional, Tuple
+from typing import Dict, List, Any, Optional, Tuple, Callable, FrozenSet, Iterable
 from dataclasses import dataclass
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, wait
 from urllib.parse import quote_plus
 import re
 
+from .compat import add_slots
+from .storage import loads_json
 
+# Basic conversation and personal user info never warrant a search
+_BASIC_RE = re.compile(
+    r'\b(hello|hi|how are you|what\'s up|good morning|good night'
+    r'|yes|no|maybe|sure|okay|alright'
+    r'|thanks|thank you|please|sorry|excuse me)\b'
+)
+_PERSONAL_RE = re.compile(
+    r'\b(my name is|i am|i\'m|me|myself'
+    r'|real life|irl|personally)\b'
+)
+
+# Capitalized words that may be character names
+_CAPWORD_RE = re.compile(r'\b[A-Z][a-z]+\b')
+
+# World-building and sci-fi terms, matched anywhere in the query
+_WORLDBUILDING_RE = re.compile("|".join(map(re.escape, (
+    'magic system', 'power', 'ability', 'spell', 'technique',
+    'location', 'city', 'kingdom', 'world', 'dimension',
+    'organization', 'guild', 'clan', 'group',
+    'item', 'weapon', 'artifact', 'tool',
+    'race', 'species', 'monster', 'creature',
+    'history', 'lore', 'legend', 'myth'
+))))
+_SCIFI_CONTEXT_RE = re.compile("|".join(map(re.escape, (
+    'sci-fi', 'science fiction', 'space', 'future'
+))))
+_SCIFI_RE = re.compile("|".join(map(re.escape, (
+    'technology', 'ship', 'weapon', 'device',
+    'alien', 'species', 'planet', 'star system',
+    'hyperspace', 'warp', 'ftl', 'faster than light'
+))))
+
+
+@add_slots
 @dataclass
 class SearchResult:
     """A search result with metadata."""
@@ -32,16 +75,42 @@ class SearchIntegration:
         self.enable_search = enable_search
         self.logger = logging.getLogger(__name__)
         
-        # Rate limiting
-        self.last_search_time = 0
-        self.min_search_interval = 2.0  # Seconds between searches
+        # Rate limiting: a token bucket allows short bursts of searches
+        # while holding the average rate
+        self.search_burst = 5  # Searches allowed back to back
+        self.search_rate = 0.5  # Searches per second refilled
+        self._tokens = float(self.search_burst)
+        self._last_refill = time.monotonic()
         
-        # Search cache
-        self.search_cache: Dict[str, List[SearchResult]] = {}
+        # Search cache: key -> (monotonic time stored, results), least
+        # recently used first
+        self._cache: "OrderedDict[str, Tuple[float, List[SearchResult]]]" = OrderedDict()
         self.cache_max_age = 3600  # 1 hour cache
-        self.cache_timestamps: Dict[str, float] = {}
+        self.cache_max_size = 256
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.cache_evictions = 0
+        
+        # Pooled HTTP session so repeat searches reuse the connection
+        self._session = requests.Session()
+        self._session.mount("https://", HTTPAdapter(
+            pool_connections=4,
+            pool_maxsize=8,
+            max_retries=Retry(total=2, backoff_factor=0.2)
+        ))
+        
+        # Search providers, queried concurrently when there are several
+        self._providers: List[Callable[[str, int], List[SearchResult]]] = [
+            self._search_duckduckgo
+        ]
+        self.provider_timeout = 5.0
+        self._executor: Optional[ThreadPoolExecutor] = None
+        
+        # Guards the cache and rate limiter across concurrent searches
+        self._lock = threading.Lock()
         
-        # Known fictional universes that benefit from search
+        # Known fictional universes that benefit from search; assigning a
+        # new collection rebuilds the matching pattern
         self.fictional_universes = {
             'rezero', 're:zero', 'subaru', 'emilia', 'rem', 'ram',
             'overlord', 'ainz', 'nazarick',
@@ -62,6 +131,28 @@ class SearchIntegration:
         
         self.logger.info(f"Initialized search integration (enabled: {enable_search})")
     
+    @property
+    def fictional_universes(self) -> FrozenSet[str]:
+        """Universe terms that make unknown names in a query worth a search.
+        
+        The set is frozen so the compiled pattern cannot go stale; assign a
+        new collection to change it.
+        """
+        return self._fictional_universes
+    
+    @fictional_universes.setter
+    def fictional_universes(self, terms: Iterable[str]) -> None:
+        self._fictional_universes = frozenset(terms)
+        
+        # Matches any universe term in a single scan of the text; with no
+        # terms it must match nothing rather than the empty string
+        if self._fictional_universes:
+            self._universe_re = re.compile(
+                "|".join(map(re.escape, self._fictional_universes))
+            )
+        else:
+            self._universe_re = re.compile(r"(?!)")
+    
     def should_search(
         self,
         query: str,
@@ -85,65 +176,36 @@ class SearchIntegration:
         context_lower = context.lower()
         
         # Don't search for basic conversation
-        basic_patterns = [
-            r'\b(hello|hi|how are you|what\'s up|good morning|good night)\b',
-            r'\b(yes|no|maybe|sure|okay|alright)\b',
-            r'\b(thanks|thank you|please|sorry|excuse me)\b'
-        ]
-        
-        for pattern in basic_patterns:
-            if re.search(pattern, query_lower):
-                return False
+        if _BASIC_RE.search(query_lower):
+            return False
         
         # Don't search for personal user info
-        personal_patterns = [
-            r'\b(my name is|i am|i\'m|me|myself)\b',
-            r'\b(real life|irl|personally)\b'
-        ]
-        
-        for pattern in personal_patterns:
-            if re.search(pattern, query_lower):
-                return False
+        if _PERSONAL_RE.search(query_lower):
+            return False
         
         # Search for unknown characters in known universes
-        for universe_term in self.fictional_universes:
-            if universe_term in context_lower or universe_term in query_lower:
-                # Check if query mentions unknown characters
-                potential_characters = re.findall(r'\b[A-Z][a-z]+\b', query)
-                known_chars = character_names or []
-                
-                for char in potential_characters:
-                    if char.lower() not in [c.lower() for c in known_chars]:
-                        self.logger.debug(f"Unknown character '{char}' in known universe, should search")
-                        return True
+        if self._universe_re.search(context_lower) or self._universe_re.search(query_lower):
+            # Check if query mentions unknown characters
+            potential_characters = _CAPWORD_RE.findall(query)
+            known_lower = {c.lower() for c in character_names or ()}
+            
+            for char in potential_characters:
+                if char.lower() not in known_lower:
+                    self.logger.debug(f"Unknown character '{char}' in known universe, should search")
+                    return True
         
         # Search for world-building details
-        worldbuilding_terms = [
-            'magic system', 'power', 'ability', 'spell', 'technique',
-            'location', 'city', 'kingdom', 'world', 'dimension',
-            'organization', 'guild', 'clan', 'group',
-            'item', 'weapon', 'artifact', 'tool',
-            'race', 'species', 'monster', 'creature',
-            'history', 'lore', 'legend', 'myth'
-        ]
-        
-        for term in worldbuilding_terms:
-            if term in query_lower:
-                self.logger.debug(f"World-building term '{term}' detected, should search")
-                return True
+        match = _WORLDBUILDING_RE.search(query_lower)
+        if match:
+            self.logger.debug(f"World-building term '{match.group()}' detected, should search")
+            return True
         
         # Search for technical details in sci-fi
-        scifi_terms = [
-            'technology', 'ship', 'weapon', 'device',
-            'alien', 'species', 'planet', 'star system',
-            'hyperspace', 'warp', 'ftl', 'faster than light'
-        ]
-        
-        if any(term in context_lower for term in ['sci-fi', 'science fiction', 'space', 'future']):
-            for term in scifi_terms:
-                if term in query_lower:
-                    self.logger.debug(f"Sci-fi term '{term}' detected, should search")
-                    return True
+        if _SCIFI_CONTEXT_RE.search(context_lower):
+            match = _SCIFI_RE.search(query_lower)
+            if match:
+                self.logger.debug(f"Sci-fi term '{match.group()}' detected, should search")
+                return True
         
         return False
     
@@ -166,34 +228,49 @@ class SearchIntegration:
         if not self.enable_search:
             return []
         
-        # Rate limiting
-        now = time.time()
-        if now - self.last_search_time < self.min_search_interval:
-            self.logger.debug("Search rate limited")
-            return []
-        
-        # Check cache
         cache_key = f"{query.lower()}:{len(context)}"
-        if (cache_key in self.search_cache and 
-            cache_key in self.cache_timestamps and
-            now - self.cache_timestamps[cache_key] < self.cache_max_age):
-            self.logger.debug("Returning cached search results")
-            return self.search_cache[cache_key][:max_results]
         
-        self.last_search_time = now
+        with self._lock:
+            # Check cache
+            cached = self._cache.get(cache_key)
+            if cached is not None:
+                if time.monotonic() - cached[0] < self.cache_max_age:
+                    self._cache.move_to_end(cache_key)
+                    self.cache_hits += 1
+                    self.logger.debug("Returning cached search results")
+                    return cached[1][:max_results]
+                del self._cache[cache_key]
+            self.cache_misses += 1
+            
+            # Rate limiting; cached results above don't use a token
+            now = time.monotonic()
+            self._tokens = min(
+                self.search_burst,
+                self._tokens + (now - self._last_refill) * self.search_rate
+            )
+            self._last_refill = now
+            if self._tokens < 1:
+                self.logger.debug("Search rate limited")
+                return []
+            self._tokens -= 1
         
         try:
             results = []
             
             # Try different search strategies
-            results.extend(self._search_duckduckgo(query, max_results))
+            for provider_results in self._run_providers(query, max_results):
+                results.extend(provider_results)
             
             # Filter and rank by relevance
             filtered_results = self._filter_and_rank(results, query, context)
             
-            # Cache results
-            self.search_cache[cache_key] = filtered_results
-            self.cache_timestamps[cache_key] = now
+            # Cache results, evicting the least recently used
+            with self._lock:
+                self._cache[cache_key] = (time.monotonic(), filtered_results)
+                self._cache.move_to_end(cache_key)
+                if len(self._cache) > self.cache_max_size:
+                    self._cache.popitem(last=False)
+                    self.cache_evictions += 1
             
             self.logger.info(f"Search for '{query}' returned {len(filtered_results)} results")
             return filtered_results[:max_results]
@@ -202,6 +279,67 @@ class SearchIntegration:
             self.logger.error(f"Search failed: {e}")
             return []
     
+    async def search_async(
+        self,
+        query: str,
+        context: str = "",
+        max_results: int = 3
+    ) -> List[SearchResult]:
+        """Perform a contextual search without blocking the event loop.
+        
+        Args:
+            query: Search query
+            context: RP context for relevance
+            max_results: Maximum results to return
+            
+        Returns:
+            List of search results
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            None, functools.partial(self.search, query, context, max_results)
+        )
+    
+    def _run_providers(self, query: str, max_results: int) -> List[List[SearchResult]]:
+        """Query every search provider, concurrently when there are several.
+        
+        Args:
+            query: Search query
+            max_results: Maximum results per provider
+            
+        Returns:
+            Results of each provider that finished in time, in provider order
+        """
+        if len(self._providers) == 1:
+            return [self._providers[0](query, max_results)]
+        
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=len(self._providers),
+                    thread_name_prefix="search"
+                )
+        
+        futures = [
+            self._executor.submit(provider, query, max_results)
+            for provider in self._providers
+        ]
+        done, pending = wait(futures, timeout=self.provider_timeout)
+        for future in pending:
+            future.cancel()
+        if pending:
+            self.logger.warning(f"{len(pending)} search providers timed out")
+        
+        results = []
+        for future in futures:
+            if future not in done:
+                continue
+            if future.exception() is not None:
+                self.logger.warning(f"Search provider failed: {future.exception()}")
+                continue
+            results.append(future.result())
+        return results
+    
     def _search_duckduckgo(self, query: str, max_results: int) -> List[SearchResult]:
         """Search using DuckDuckGo instant answer API.
         
@@ -224,10 +362,10 @@ class SearchIntegration:
                 'skip_disambig': '1'
             }
             
-            response = requests.get(url, params=params, timeout=5)
+            response = self._session.get(url, params=params, timeout=5)
             response.raise_for_status()
             
-            data = response.json()
+            data = loads_json(response.content)
             
             # Abstract
             if data.get('Abstract'):
@@ -277,24 +415,33 @@ class SearchIntegration:
         query_words = set(query.lower().split())
         context_words = set(context.lower().split())
         
+        # Whole whitespace-separated words of the content that are query
+        # words, found without splitting the whole content
+        query_re = None
+        if query_words:
+            query_re = re.compile(
+                r'(?<!\S)(?:' + '|'.join(map(re.escape, query_words)) + r')(?!\S)'
+            )
+        
         scored_results = []
         
         for result in results:
             score = result.relevance_score
             
-            content_words = set(result.content.lower().split())
+            content_lower = result.content.lower()
             title_words = set(result.title.lower().split())
             
             # Boost score for query word matches
-            query_matches = len(query_words.intersection(content_words))
+            query_matches = len(set(query_re.findall(content_lower))) if query_re else 0
             title_matches = len(query_words.intersection(title_words))
             
             score += query_matches * 0.1
             score += title_matches * 0.2
             
             # Boost for context relevance
-            context_matches = len(context_words.intersection(content_words))
-            score += min(context_matches * 0.05, 0.3)
+            if context_words:
+                context_matches = len(context_words.intersection(content_lower.split()))
+                score += min(context_matches * 0.05, 0.3)
             
             # Boost trusted sources
             if result.source_type == 'wiki':
@@ -308,7 +455,7 @@ class SearchIntegration:
             
             # Penalize irrelevant content
             irrelevant_terms = ['disambiguation', 'may refer to', 'see also']
-            if any(term in result.content.lower() for term in irrelevant_terms):
+            if any(term in content_lower for term in irrelevant_terms):
                 score -= 0.4
             
             scored_results.append((score, result))
@@ -362,10 +509,16 @@ class SearchIntegration:
         
         return "".join(formatted_parts)
     
+    def close(self) -> None:
+        """Close pooled HTTP connections and provider threads."""
+        self._session.close()
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+    
     def clear_cache(self) -> None:
         """Clear the search cache."""
-        self.search_cache.clear()
-        self.cache_timestamps.clear()
+        self._cache.clear()
         self.logger.info("Search cache cleared")
     
     def get_stats(self) -> Dict[str, Any]:
@@ -376,7 +529,10 @@ class SearchIntegration:
         """
         return {
             "enabled": self.enable_search,
-            "cache_size": len(self.search_cache),
-            "last_search": self.last_search_time,
+            "cache_size": len(self._cache),
+            "cache_hits": self.cache_hits,
+            "cache_misses": self.cache_misses,
+            "cache_evictions": self.cache_evictions,
+            "search_tokens": self._tokens,
             "fictional_universes": len(self.fictional_universes)
         }
\ No newline at end of file
@@ -0,0 +1,87 @@
+"""JSON persistence helpers shared by the on-disk stores."""
+
+import json
+import mmap
+import os
+from pathlib import Path
+from typing import Any, Callable, Optional
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+
+def dumps_json(
+    data: Any,
+    pretty: bool = False,
+    default: Optional[Callable[[Any], Any]] = str
+) -> bytes:
+    """Encode data as JSON bytes, using orjson when it is installed.
+
+    Args:
+        data: Data to encode
+        pretty: Whether to indent the output for human inspection
+        default: Converts values JSON cannot encode, or None when the
+            data is known to be plain JSON
+
+    Returns:
+        UTF-8 encoded JSON
+    """
+    if ORJSON_AVAILABLE:
+        option = orjson.OPT_NON_STR_KEYS
+        if pretty:
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(data, default=default, option=option)
+    if pretty:
+        return json.dumps(data, indent=2, default=default).encode("utf-8")
+    return json.dumps(data, separators=(",", ":"), default=default).encode("utf-8")
+
+
+def atomic_write_bytes(path: Path, data: bytes, fsync: bool = False) -> None:
+    """Write a file via a temporary sibling and rename it into place.
+
+    Args:
+        path: File to write
+        data: File contents
+        fsync: Whether to force the data to disk before the rename
+    """
+    tmp_path = path.with_name(path.name + ".tmp")
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+        if fsync:
+            f.flush()
+            os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def loads_json(data: bytes) -> Any:
+    """Parse JSON bytes, using orjson when it is installed.
+
+    Args:
+        data: UTF-8 encoded JSON
+
+    Returns:
+        Parsed data
+    """
+    if ORJSON_AVAILABLE:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def load_json_file(path: Path) -> Any:
+    """Parse a JSON file, mapping it into memory when orjson is installed.
+
+    Args:
+        path: File to read
+
+    Returns:
+        Parsed data
+    """
+    with open(path, "rb") as f:
+        if not ORJSON_AVAILABLE:
+            return json.load(f)
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            with memoryview(mm) as view:
+                return orjson.loads(view)
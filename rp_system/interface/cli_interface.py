@@ -232,16 +232,17 @@ class CLIInterface:
             session_config.scenario_type = scenario_type
             
             # Load characters from scenario
-            for char_name, char_data in self.current_scenario.config.characters.items():
-                self.character_system.create_character(
-                    name=char_name,
-                    description=char_data.get("description", ""),
-                    personality=char_data.get("personality", ""),
-                    background=char_data.get("background", ""),
-                    abilities=char_data.get("abilities", {}),
-                    equipment=char_data.get("equipment", []),
-                    current_goals=char_data.get("goals", [])
-                )
+            with self.character_system.bulk_update():
+                for char_name, char_data in self.current_scenario.config.characters.items():
+                    self.character_system.create_character(
+                        name=char_name,
+                        description=char_data.get("description", ""),
+                        personality=char_data.get("personality", ""),
+                        background=char_data.get("background", ""),
+                        abilities=char_data.get("abilities", {}),
+                        equipment=char_data.get("equipment", []),
+                        current_goals=char_data.get("goals", [])
+                    )
             
             # Set active characters
             active_chars = list(self.current_scenario.config.characters.keys())
@@ -329,7 +330,7 @@ class CLIInterface:
             # Quick validation before processing
             try:
                 # Try a quick token count to validate API key
-                test_tokens = self.gemini_client.count_tokens("test")
+                test_tokens = self.gemini_client.count_tokens("test", exact=True, use_cache=False)
                 if test_tokens <= 0:
                     return ("AI service is currently unavailable. Please check your API key configuration "
                            "with 'rp-system --setup'.")
@@ -680,6 +681,14 @@ def main():
         cli.start_conversation()
     except KeyboardInterrupt:
         print("\nGoodbye!")
+    finally:
+        # Write memories still waiting on the background saver
+        if cli.memory_system:
+            cli.memory_system.close()
+        if cli.character_system:
+            cli.character_system.close()
+        if cli.search_integration:
+            cli.search_integration.close()
     
     return 0
 
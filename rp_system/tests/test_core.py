@@ -10,6 +10,7 @@ from ..core.context_manager import ContextManager, ContextSegment
 from ..core.memory_system import MemorySystem, MemoryEntry
 from ..scenarios.scenario_loader import ScenarioLoader
 from ..characters.character_system import CharacterSystem
+from ..characters.personality_engine import PersonalityEngine
 from ..world.world_state import WorldState
 from ..interface.config_manager import ConfigManager
 
@@ -52,6 +53,112 @@ class TestContextManager(unittest.TestCase):
         # Character sheet should still be there
         self.assertEqual(len(self.context_manager.character_sheets), 1)
         self.assertEqual(self.context_manager.character_sheets[0].characters[0], "TestChar")
+    
+    def test_compression_low_watermark(self):
+        """Test compression frees space down to the low watermark."""
+        for i in range(12):
+            self.context_manager.add_memory(f"Memory {i}", 60, importance=0.2)
+        self.context_manager.add_message("Message", 300)
+        
+        self.assertLessEqual(
+            self.context_manager._total_tokens(),
+            self.context_manager.compression_low_watermark
+        )
+    
+    def test_full_recent_store_archives_overflow(self):
+        """Test messages beyond the recent bound go to a summary, not nowhere."""
+        manager = ContextManager(max_tokens=10 ** 6)
+        maxlen = manager.recent_context.maxlen
+        for i in range(maxlen + 1):
+            manager.add_message(f"Message {i}", 1)
+        
+        archived = maxlen // 4
+        self.assertEqual(len(manager.recent_context), maxlen + 1 - archived)
+        self.assertEqual(manager.recent_context[0].content, f"Message {archived}")
+        self.assertEqual(len(manager.summaries), 1)
+        self.assertIn(f"Summary of {archived} messages", manager.summaries[0].content)
+    
+    def test_compression_retriggers_above_max_tokens(self):
+        """Test a protected sheet over the watermark doesn't delay compression."""
+        manager = self.context_manager
+        manager.set_character_sheet("Alice", "Sheet", 900)
+        for i in range(3):
+            manager.add_memory(f"Memory {i}", 100, importance=0.5)
+        manager.add_message("First", 10)
+        self.assertEqual(len(manager.memory_segments), 2)
+        
+        # Back above max_tokens with one evictable memory
+        manager.add_memory("Memory 3", 100, importance=0.5)
+        manager.add_message("Second", 10)
+        self.assertEqual(len(manager.memory_segments), 2)
+    
+    def test_eviction_decays_importance(self):
+        """Test stale memories are evicted before fresh, less important ones."""
+        self.context_manager.add_memory("Kept 1", 100, importance=0.95)
+        self.context_manager.add_memory("Kept 2", 100, importance=0.95)
+        self.context_manager.add_memory("Old", 400, importance=0.9)
+        self.context_manager.add_memory("New", 400, importance=0.5)
+        self.context_manager.memory_segments.timestamps[2] -= 3 * 3600 * 10 ** 9  # 3 hours
+        
+        self.context_manager._remove_low_importance()
+        self.assertEqual(self.context_manager.memory_segments.contents, ["Kept 1", "Kept 2", "New"])
+    
+    def test_eviction_of_old_segments_follows_importance(self):
+        """Test importance still ranks segments that are equally old."""
+        self.context_manager.add_memory("Kept 1", 100, importance=0.95)
+        self.context_manager.add_memory("Kept 2", 100, importance=0.95)
+        self.context_manager.add_memory("Old high", 400, importance=0.9)
+        self.context_manager.add_memory("Old low", 400, importance=0.3)
+        timestamps = self.context_manager.memory_segments.timestamps
+        timestamps[2] -= 2 * 3600 * 10 ** 9  # 2 hours
+        timestamps[3] -= 2 * 3600 * 10 ** 9
+        
+        self.context_manager._remove_low_importance()
+        self.assertEqual(self.context_manager.memory_segments.contents, ["Kept 1", "Kept 2", "Old high"])
+    
+    def test_segment_store_columns(self):
+        """Test segment stores keep columns and token totals in step."""
+        self.context_manager.add_memory("Low", 10, importance=0.2)
+        self.context_manager.add_memory("High", 20, importance=0.9)
+        memories = self.context_manager.memory_segments
+        
+        self.assertEqual([s.content for s in memories], ["High", "Low"])
+        self.assertIsInstance(memories[-1], ContextSegment)
+        self.assertEqual(memories[-1].segment_type, "memory")
+        
+        memories.remove([1])
+        self.assertEqual(memories.contents, ["High"])
+        self.assertEqual(memories.total_tokens, 20)
+        self.assertEqual(self.context_manager.get_stats()["tokens_by_type"]["memories"], 20)
+    
+    def test_memories_sorted_by_importance(self):
+        """Test memories stay sorted by importance, ties in insertion order."""
+        for content, importance in [("A", 0.5), ("B", 0.9), ("C", 0.5), ("D", 0.7)]:
+            self.context_manager.add_memory(content, 1, importance=importance)
+        self.assertEqual(self.context_manager.memory_segments.contents, ["B", "D", "A", "C"])
+    
+    def test_segment_store_maxlen(self):
+        """Test bounded stores drop their oldest segments."""
+        summaries = self.context_manager.summaries
+        for i in range(summaries.maxlen + 5):
+            self.context_manager.add_summary(f"Summary {i}", 1)
+        
+        self.assertEqual(len(summaries), summaries.maxlen)
+        self.assertEqual(summaries.total_tokens, summaries.maxlen)
+        self.assertTrue(summaries[0].content.endswith("Summary 5"))
+    
+    def test_build_context_reuses_head(self):
+        """Test the cached context head is rebuilt when its stores change."""
+        self.context_manager.set_character_sheet("Alice", "Alice sheet", 10)
+        self.context_manager.add_message("First", 5)
+        self.assertEqual(self.context_manager.build_context("System"),
+                         "System\n\n[CHARACTER SHEET]\nAlice sheet\n\nFirst")
+        
+        self.context_manager.add_message("Second", 5)
+        self.context_manager.add_memory("Key event", 5, importance=0.9)
+        context = self.context_manager.build_context("System")
+        self.assertTrue(context.endswith("Key event\n\nFirst\n\nSecond"))
+        self.assertFalse(self.context_manager.build_context().startswith("System"))
 
 
 class TestMemorySystem(unittest.TestCase):
@@ -62,6 +169,7 @@ class TestMemorySystem(unittest.TestCase):
         self.memory_system = MemorySystem(storage_path=self.temp_dir)
     
     def tearDown(self):
+        self.memory_system.close()
         shutil.rmtree(self.temp_dir)
     
     def test_add_memory(self):
@@ -98,6 +206,7 @@ class TestMemorySystem(unittest.TestCase):
         """Test that memories persist across sessions."""
         # Add a memory
         self.memory_system.add_memory("Persistent memory", importance=0.8)
+        self.memory_system.close()
         
         # Create new memory system with same storage
         new_memory_system = MemorySystem(storage_path=self.temp_dir)
@@ -106,6 +215,49 @@ class TestMemorySystem(unittest.TestCase):
         memories = new_memory_system.retrieve_memories()
         self.assertEqual(len(memories), 1)
         self.assertEqual(memories[0].content, "Persistent memory")
+        new_memory_system.close()
+    
+    def test_saves_are_batched(self):
+        """Test memory changes are written once on flush, not per add."""
+        memory_system = MemorySystem(storage_path=self.temp_dir, save_interval=60)
+        memory_system.add_memory("First", importance=0.8)
+        memory_system.add_memory("Second", importance=0.8)
+        self.assertFalse((Path(self.temp_dir) / "memories.json").exists())
+        
+        memory_system.close()
+        reopened = MemorySystem(storage_path=self.temp_dir)
+        self.assertEqual(len(reopened.recent_memories), 2)
+        reopened.close()
+    
+    def test_add_memories_in_bulk(self):
+        """Test bulk additions skip duplicates and wait for a snapshot."""
+        memory_system = MemorySystem(storage_path=self.temp_dir, save_interval=None)
+        with patch.object(memory_system, "flush", wraps=memory_system.flush) as flush:
+            added = memory_system.add_memories([
+                {"content": "First"},
+                {"content": "Second", "importance": 0.9},
+                {"content": "First"}
+            ])
+        
+        self.assertEqual([m.content for m in added[:2]], ["First", "Second"])
+        self.assertIsNone(added[2])
+        self.assertEqual(flush.call_count, 0)
+        memory_system.close()
+    
+    def test_log_replayed_without_snapshot(self):
+        """Test memories added since the last snapshot are recovered from the log."""
+        memory_system = MemorySystem(storage_path=self.temp_dir, save_interval=None)
+        for i in range(MemorySystem.SNAPSHOT_INTERVAL + 2):
+            memory_system.add_memory(f"Memory {i}", importance=0.8)
+        
+        # Reopen without closing, as after a crash
+        reopened = MemorySystem(storage_path=self.temp_dir)
+        self.assertEqual(
+            [m.content for m in reopened.recent_memories],
+            [m.content for m in memory_system.recent_memories]
+        )
+        reopened.close()
+        memory_system.close()
 
 
 class TestScenarioLoader(unittest.TestCase):
@@ -146,6 +298,7 @@ class TestCharacterSystem(unittest.TestCase):
         self.character_system = CharacterSystem(storage_path=self.temp_dir)
     
     def tearDown(self):
+        self.character_system.close()
         shutil.rmtree(self.temp_dir)
     
     def test_create_character(self):
@@ -190,6 +343,120 @@ class TestCharacterSystem(unittest.TestCase):
         active = self.character_system.get_active_characters()
         self.assertEqual(len(active), 2)
         self.assertEqual({char.name for char in active}, {"Alice", "Bob"})
+    
+    def test_bulk_update_defers_save(self):
+        """Test that bulk updates write character data once on exit."""
+        character_file = Path(self.temp_dir) / "characters.json"
+        
+        with self.character_system.bulk_update():
+            self.character_system.create_character("Alice")
+            self.character_system.create_character("Bob")
+            self.character_system.set_character_relationship("Alice", "Bob", 0.5)
+            self.assertFalse(character_file.exists())
+        
+        self.assertTrue(character_file.exists())
+        
+        reloaded = CharacterSystem(storage_path=self.temp_dir)
+        self.assertEqual(set(reloaded.characters), {"Alice", "Bob"})
+        self.assertEqual(reloaded.get_relationship("Alice", "Bob"), 0.5)
+    
+    def test_stats_relationship_count(self):
+        """Test that each relationship pair is counted once."""
+        for name in ("Alice", "Bob", "Charlie"):
+            self.character_system.create_character(name)
+        
+        self.character_system.set_character_relationship("Alice", "Bob", 0.5)
+        self.character_system.set_character_relationship("Bob", "Alice", -0.2)
+        self.character_system.set_character_relationship("Bob", "Charlie", 0.9)
+        
+        stats = self.character_system.get_stats()
+        self.assertEqual(stats["total_relationships"], 2)
+    
+    def test_relationship_log_replay(self):
+        """Test that relationship changes survive a reload between snapshots."""
+        self.character_system.create_character("Alice")
+        self.character_system.create_character("Bob")
+        self.character_system.set_character_relationship("Alice", "Bob", -0.4, "Argument")
+        self.character_system.close()
+        
+        reloaded = CharacterSystem(storage_path=self.temp_dir)
+        self.assertEqual(reloaded.get_relationship("Bob", "Alice"), -0.4)
+        self.assertEqual(len(reloaded.relationship_history), 1)
+        self.assertEqual(reloaded.relationship_history[0].reason, "Argument")
+        reloaded.close()
+    
+    def test_character_knows_after_direct_fact_swap(self):
+        """Test facts swapped directly on the fact set are still found."""
+        character = self.character_system.create_character("Alice")
+        self.character_system.add_character_knowledge("Alice", "old")
+        self.assertTrue(self.character_system.character_knows("Alice", "old"))
+        
+        character.known_facts.discard("old")
+        character.known_facts.add("new")
+        self.assertTrue(self.character_system.character_knows("Alice", "new"))
+        self.assertFalse(self.character_system.character_knows("Alice", "old"))
+    
+    def test_snapshot_overrides_older_log_entries(self):
+        """Test that logged changes already in the snapshot are not replayed."""
+        self.character_system.create_character("Alice")
+        self.character_system.create_character("Bob")
+        self.character_system.set_character_relationship("Alice", "Bob", 0.5)
+        self.character_system.update_character("Alice", relationships={"Bob": -0.9})
+        self.character_system.close()
+        
+        reloaded = CharacterSystem(storage_path=self.temp_dir)
+        self.assertEqual(reloaded.characters["Alice"].relationships["Bob"], -0.9)
+        self.assertEqual(len(reloaded.relationship_history), 1)
+        reloaded.close()
+
+
+class TestPersonalityEngine(unittest.TestCase):
+    """Test personality engine functionality."""
+    
+    def setUp(self):
+        self.engine = PersonalityEngine()
+    
+    def test_emotion_guidance_lookup(self):
+        """Test emotion words and category names resolve to guidance."""
+        profile = self.engine.create_personality_profile({"neuroticism": 0.8, "extraversion": -0.8})
+        
+        guidance = self.engine.generate_response_guidance(profile, "Furious", "")
+        self.assertIn("Emotional state: Express Furious intensely and internally", guidance)
+        
+        guidance = self.engine.generate_response_guidance({"traits": {}}, "joy", "")
+        self.assertIn("Emotional state: Express joy moderately and carefully", guidance)
+        
+        guidance = self.engine.generate_response_guidance(profile, "bewildered", "")
+        self.assertIn("Emotional state: Currently feeling bewildered", guidance)
+    
+    def test_cached_profiles_are_independent(self):
+        """Test profiles built from the same traits do not share state."""
+        traits = {"extraversion": 0.9, "conscientiousness": 0.9}
+        first = self.engine.create_personality_profile(traits)
+        first["speech_style"]["patterns"].append("Listen here")
+        first["behavioral_tendencies"].clear()
+        
+        second = self.engine.create_personality_profile(traits)
+        self.assertNotIn("Listen here", second["speech_style"]["patterns"])
+        self.assertIn("Plans ahead carefully", second["behavioral_tendencies"])
+    
+    def test_guidance_follows_edited_traits(self):
+        """Test guidance reads traits changed after the profile was created."""
+        profile = self.engine.create_personality_profile({"extraversion": 0.9})
+        profile["traits"]["extraversion"] = -0.9
+        
+        guidance = self.engine.generate_response_guidance(profile, "happy", "")
+        self.assertIn("Be more reserved and thoughtful", guidance)
+        self.assertNotIn("Be outgoing and engage actively", guidance)
+    
+    def test_guidance_follows_edited_behaviors(self):
+        """Test guidance lists the current behavioral tendencies."""
+        profile = self.engine.create_personality_profile({"extraversion": 0.9})
+        profile["behavioral_tendencies"][:] = ["Hums while working"]
+        
+        guidance = self.engine.generate_response_guidance(profile, "", "")
+        self.assertIn("Behavior: Hums while working", guidance)
+        self.assertFalse(any(key.startswith("_") for key in profile))
 
 
 class TestWorldState(unittest.TestCase):